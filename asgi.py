@@ -0,0 +1,62 @@
+"""
+ASGI-режим:
+
+    uvicorn asgi:app --workers 2
+
+Соединения держит event loop сервера, Flask (маршрутизация, вьюхи, шаблоны,
+минификация) выполняется в пуле из ASGI_THREADS потоков, а запросы карточек
+к upstream всех запросов процесса - в одном общем loop'е (background.py),
+где живут SWR-кэши карточек и пул соединений aiohttp. WSGI-режим
+(gunicorn "main:create_app()") работает как раньше.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, MutableMapping
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from background import is_running, submit
+from http_client import close_session
+from main import create_app
+from settings import ASGI_THREADS
+
+Scope = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_executor = ThreadPoolExecutor(ASGI_THREADS, thread_name_prefix="asgi")
+# Тело WsgiToAsgiInstance.run_wsgi_app без декоратора @sync_to_async. Это
+# внутренность asgiref: версия закреплена в requirements.txt, а
+# tests/test_asgi.py проверяет, что адаптер собирается и отвечает на запрос
+_run_wsgi_app = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+
+
+class _Instance(WsgiToAsgiInstance):
+    async def run_wsgi_app(self, body: Any) -> None:
+        # asgiref по умолчанию выполняет WSGI-приложение в одном потоке на
+        # процесс (thread_sensitive=True), то есть по запросу за раз
+        await sync_to_async(_run_wsgi_app, thread_sensitive=False, executor=_executor)(self, body)
+
+
+class ASGIApp(WsgiToAsgi):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        await _Instance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if is_running():
+                    await asyncio.wrap_future(submit(close_session()))
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = ASGIApp(create_app())
@@ -0,0 +1,93 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from flask import url_for as flask_url_for
+
+ASSETS_DIR = Path("build/assets")
+MANIFEST_NAME = "manifest.json"
+STATIC_ROOT = Path("static")
+
+# Бандлы: логическое имя -> исходные файлы в static/ (порядок важен)
+BUNDLES: Dict[str, List[str]] = {
+    "bundles/base.css": [
+        "chartist/chartist.min.css",
+        "variables.css",
+        "sidebar.css",
+        "navigation.css",
+        "info_panel_button.css",
+        "styles.css",
+        "photoswipe/photoswipe.css",
+        "photoswipe/photoswipe-dynamic-caption-plugin.css",
+    ],
+    "bundles/timeline.js": [
+        "timeline/timeline-hover.js",
+        "timeline/timeline.js",
+        "timeline/timeline-dates.js",
+    ],
+}
+
+
+class AssetManifest:
+    """
+    Манифест build_assets.py: логическое имя файла из static/ -> хэшированный
+    файл в build/assets. Перечитывается при изменении mtime; без манифеста
+    всё отдаётся из static/ как раньше.
+    """
+
+    def __init__(self, directory: Path = ASSETS_DIR) -> None:
+        self.directory = directory
+        self._mtime: Optional[float] = None
+        self._files: Dict[str, str] = {}
+
+    def _refresh(self) -> None:
+        try:
+            mtime: Optional[float] = os.stat(self.directory / MANIFEST_NAME).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            files: Dict[str, str] = {}
+            if mtime is not None:
+                with open(self.directory / MANIFEST_NAME, encoding="utf-8") as f:
+                    files = json.load(f)["files"]
+            self._files = files
+            self._mtime = mtime
+
+    @property
+    def files(self) -> Dict[str, str]:
+        self._refresh()
+        return self._files
+
+    @property
+    def version(self) -> Optional[float]:
+        """mtime манифеста, по которому строятся URL, или None без сборки."""
+        self._refresh()
+        return self._mtime
+
+    def get(self, name: str) -> Optional[str]:
+        return self.files.get(name)
+
+
+ASSETS = AssetManifest()
+
+
+def url_for(endpoint: str, **values: Any) -> str:
+    """
+    url_for для шаблонов: файлы из static/, для которых собран хэшированный
+    вариант, отдаются через /assets/ с неизменяемым кэшем.
+    """
+    if endpoint == "static":
+        hashed = ASSETS.get(values.get("filename", ""))
+        if hashed is not None:
+            values["filename"] = hashed
+            return flask_url_for("assets", **values)
+    return flask_url_for(endpoint, **values)
+
+
+def bundle_urls(name: str) -> List[str]:
+    """URL бандла, если он собран, иначе URL исходных файлов по отдельности."""
+    hashed = ASSETS.get(name)
+    if hashed is not None:
+        return [flask_url_for("assets", filename=hashed)]
+    return [url_for("static", filename=source) for source in BUNDLES[name]]
@@ -0,0 +1,51 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pid: Optional[int] = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Долгоживущий event loop в отдельном потоке: в нём выполняются
+    запросы карточек к upstream (см. main.py), фоновые задачи и общие future'ы.
+    После fork'а loop создаётся заново.
+    """
+    global _loop, _pid
+    with _lock:
+        if _loop is None or _pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="background-loop", daemon=True)
+            thread.start()
+            _loop, _pid = loop, os.getpid()
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """Запускает корутину в фоновом loop'е, результат можно ждать из любого потока."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Выполняет корутину в фоновом loop'е и ждёт результат. Контекстные
+    переменные вызывающего потока (request, g) видны внутри корутины.
+    Нельзя вызывать из работающего loop'а: поток заблокируется.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return submit(coro).result()
+    coro.close()
+    raise RuntimeError("background.run() вызван из работающего event loop'а")
+
+
+def is_running() -> bool:
+    """Запущен ли фоновый loop в текущем процессе."""
+    return _loop is not None and _pid == os.getpid() and _loop.is_running()
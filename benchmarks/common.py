@@ -0,0 +1,36 @@
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+
+def measure(fn: Callable[[], Any], repeat: int = 50, warmup: int = 3) -> Dict[str, float]:
+    """Время вызова fn в миллисекундах: min / median / mean."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def format_row(name: str, stats: Dict[str, float]) -> str:
+    return (
+        f"{name:<40} min {stats['min_ms']:8.3f} ms   "
+        f"median {stats['median_ms']:8.3f} ms   mean {stats['mean_ms']:8.3f} ms"
+    )
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50 / p95 / p99 / max по выборке (в тех же единицах, что и samples)."""
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
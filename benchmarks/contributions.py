@@ -0,0 +1,77 @@
+"""
+Помесячная агрегация contributionCalendar: прежний вариант на strptime/strftime
+против ContributionCalendar (полный пересчёт и инкрементальное обновление).
+Совпадение результатов проверяет tests/test_contributions.py (make test).
+
+    python -m benchmarks.contributions
+"""
+
+import argparse
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from benchmarks.common import format_row, measure
+from contributions import ContributionCalendar, aggregate_monthly
+
+
+def legacy_monthly(weeks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Прежний код из github.fetch_github_data."""
+    monthly_totals: Dict[str, int] = defaultdict(int)
+    for week in weeks:
+        for day in week["contributionDays"]:
+            month_key = datetime.strptime(day["date"], "%Y-%m-%d").strftime("%B %Y")
+            monthly_totals[month_key] += day["contributionCount"]
+
+    monthly_contributions: Dict[str, tuple[int, float]] = {}
+    if monthly_totals:
+        max_total = max(monthly_totals.values())
+        percent_step = 100 / max_total
+        for month_key, total in monthly_totals.items():
+            monthly_contributions[month_key] = (total, percent_step * total)
+
+    sorted_monthly = dict(
+        sorted(monthly_contributions.items(), key=lambda x: datetime.strptime(x[0], "%B %Y"))
+    )
+    keys_sm = list(sorted_monthly.keys())
+    return {
+        "monthly": sorted_monthly,
+        "first_month": keys_sm[0] if keys_sm else "",
+        "last_month": keys_sm[-1] if keys_sm else "",
+    }
+
+
+def make_weeks(end: date, days: int = 371, seed: int = 0) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    start = end - timedelta(days=days - 1)
+    all_days = [
+        {"date": (start + timedelta(days=i)).isoformat(), "contributionCount": rnd.randint(0, 12)}
+        for i in range(days)
+    ]
+    return [{"contributionDays": all_days[i : i + 7]} for i in range(0, days, 7)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    weeks = make_weeks(date(2025, 6, 15))
+
+    print(
+        format_row("legacy strptime/strftime", measure(lambda: legacy_monthly(weeks), args.repeat))
+    )
+    print(format_row("aggregate_monthly", measure(lambda: aggregate_monthly(weeks), args.repeat)))
+
+    warm = ContributionCalendar().merge_weeks(weeks)
+    print(
+        format_row(
+            "incremental merge (same year)",
+            measure(lambda: warm.merge_weeks(weeks).monthly(), args.repeat),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
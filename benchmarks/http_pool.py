@@ -0,0 +1,73 @@
+"""
+Сессия на каждое обновление против общего пула соединений (http_client).
+
+    python -m benchmarks.http_pool [--refreshes 50] [--latency 0.005]
+
+Stub-сервер поднимается локально без TLS, поэтому число соединений здесь
+равно числу TCP-handshake'ов; в реальной сети к каждому добавляется TLS.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import aiohttp
+
+from benchmarks.stub_server import StubServer
+from http_client import close_session, get_session
+
+PARALLEL = 3  # как в steam.get_user_data
+
+
+async def _refresh(session: aiohttp.ClientSession, url: str) -> None:
+    async def one() -> None:
+        async with session.get(url) as resp:
+            await resp.json()
+
+    await asyncio.gather(*(one() for _ in range(PARALLEL)))
+
+
+async def per_call_session(url: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        await _refresh(session, url)
+
+
+async def pooled_session(url: str) -> None:
+    await _refresh(get_session(), url)
+
+
+async def run(
+    server: StubServer, name: str, fn: Callable[[str], Awaitable[None]], refreshes: int
+) -> None:
+    server.reset_counters()
+    samples: List[float] = []
+    for _ in range(refreshes):
+        start = time.perf_counter()
+        await fn(server.url + "/api")
+        samples.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{name:<22} connections {server.connections:4d}   requests {server.requests:4d}   "
+        f"median {statistics.median(samples):7.3f} ms   max {max(samples):7.3f} ms"
+    )
+
+
+async def main(refreshes: int, latency: float) -> None:
+    server = StubServer(latency=latency)
+    server.add_json("GET", "/api", {"response": {"ok": True}})
+    await server.start()
+    try:
+        await run(server, "session per refresh", per_call_session, refreshes)
+        await run(server, "pooled session", pooled_session, refreshes)
+    finally:
+        await close_session()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--refreshes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.refreshes, args.latency))
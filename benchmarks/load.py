@@ -0,0 +1,212 @@
+"""
+Нагрузочный тест: приложение под gunicorn, Steam и GitHub подменены
+заглушками из benchmarks/upstreams.py. Для каждого пути считает пропускную
+способность и p50/p95/p99 при заданной конкурентности.
+
+    python -m benchmarks.load [--requests 500] [--concurrency 16] [--workers 2] [--server asgi]
+
+Секреты и общий кэш создаются во временном каталоге, configs/secrets.json
+не нужен.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import aiohttp
+
+from benchmarks.common import percentiles
+from benchmarks.upstreams import upstream_env, upstream_stub
+
+ROOT = Path(__file__).resolve().parent.parent
+PATHS = ["/", "/experience", "/papers/pikabu", "/cards/steam", "/cards/github"]
+# Как у браузера: приложение отдаёт сжатые страницы
+HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+BENCH_SECRETS = {
+    "github": "bench-token",
+    "github_id": "Miskler",
+    "steam": "bench-key",
+    "steam_id": "76561198000000000",
+    "password_cv": "bench",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def start_app(
+    env: Dict[str, str], port: int, workers: int, threads: int, server: str = "wsgi"
+) -> subprocess.Popen:
+    """server: wsgi - gunicorn main:create_app(), asgi - uvicorn asgi:app (потоки: ASGI_THREADS)."""
+    if server == "asgi":
+        cmd = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "asgi:app",
+        ]
+        env = {**env, "ASGI_THREADS": str(threads)}
+    else:
+        cmd = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--workers",
+            str(workers),
+            "--threads",
+            str(threads),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+            "main:create_app()",
+        ]
+    return subprocess.Popen(cmd, cwd=ROOT, env={**os.environ, **env})
+
+
+async def wait_ready(session: aiohttp.ClientSession, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url}: приложение не запустилось за {timeout} с")
+        await asyncio.sleep(0.2)
+
+
+async def hammer(
+    session: aiohttp.ClientSession, url: str, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """requests запросов к url, concurrency одновременно. Время в миллисекундах."""
+    samples: List[float] = []
+    errors = 0
+    sent = 0
+    received = 0
+
+    async def worker() -> None:
+        nonlocal errors, sent, received
+        while sent < requests:
+            sent += 1
+            start = time.perf_counter()
+            try:
+                async with session.get(url, headers=HEADERS) as resp:
+                    body = await resp.read()
+                    if resp.status != 200:
+                        errors += 1
+                    received += len(body)
+            except aiohttp.ClientError:
+                errors += 1
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / elapsed,
+        "bytes_per_request": received / max(1, len(samples)),
+        "latency_ms": percentiles(samples),
+    }
+
+
+async def run(
+    requests: int,
+    concurrency: int,
+    workers: int,
+    threads: int,
+    latency: float,
+    server: str = "wsgi",
+) -> Dict[str, Any]:
+    stub = upstream_stub(latency=latency)
+    await stub.start()
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets = Path(tmp) / "secrets.json"
+        secrets.write_text(json.dumps(BENCH_SECRETS), encoding="utf-8")
+        env = {
+            **upstream_env(stub),
+            "SECRETS_PATH": str(secrets),
+            "SHARED_CACHE_DIR": tmp,
+            "PREFETCH_IN_PROCESS": "0",
+        }
+        app = start_app(env, port, workers, threads, server)
+        # auto_decompress=False: меряем то, что реально уходит по сети
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        try:
+            await wait_ready(session, base + "/")
+            results: Dict[str, Any] = {}
+            for path in PATHS:
+                # прогрев: кэши страниц и первый поход в заглушки
+                await hammer(session, base + path, concurrency, concurrency)
+                results[path] = await hammer(session, base + path, requests, concurrency)
+            results["upstream_requests"] = stub.requests
+            return results
+        finally:
+            await session.close()
+            app.terminate()
+            app.wait(timeout=10)
+            await stub.stop()
+
+
+def format_result(path: str, result: Dict[str, Any]) -> str:
+    lat = result["latency_ms"]
+    return (
+        f"{path:<18} {result['rps']:8.1f} rps   p50 {lat['p50']:7.2f}   p95 {lat['p95']:7.2f}   "
+        f"p99 {lat['p99']:7.2f} ms   {result['bytes_per_request']:8.0f} B   "
+        f"errors {result['errors']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка заглушек, с")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run(
+            args.requests,
+            args.concurrency,
+            args.workers,
+            args.threads,
+            args.latency,
+            args.server,
+        )
+    )
+    for path in PATHS:
+        print(format_result(path, results[path]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Микробенчмарки горячих функций: render_md, wrap_images, humanize_timestamp
+и github._process_repo_node (на узлах из benchmarks/fixtures).
+
+    python -m benchmarks.micro [--repeat 200]
+"""
+
+import argparse
+from typing import Any, Dict, List
+
+from benchmarks.common import format_row, measure
+from benchmarks.upstreams import load_fixture
+from github import _process_repo_node
+from papers import PAPERS_DIR
+from pswp import wrap_images
+from tools import humanize_timestamp, render_md
+
+PAPER = PAPERS_DIR / "pikabu" / "paper.md"
+
+
+def repo_nodes() -> List[Dict[str, Any]]:
+    viewer = load_fixture("github/graphql.json")["data"]["viewer"]
+    return list(viewer["p0"]["nodes"]) + list(viewer["p1"]["nodes"])
+
+
+def run(repeat: int) -> Dict[str, Dict[str, float]]:
+    md = PAPER.read_text(encoding="utf-8")
+    html = render_md(md)
+    nodes = repo_nodes()
+
+    def process_nodes() -> None:
+        for node in nodes:
+            _process_repo_node(node)
+
+    cases = {
+        "render_md(pikabu)": lambda: render_md(md),
+        "render_md(pikabu, gallery=True)": lambda: render_md(md, gallery=True),
+        "wrap_images(pikabu)": lambda: wrap_images(html),
+        "humanize_timestamp(int)": lambda: humanize_timestamp(1420000000),
+        "humanize_timestamp(iso)": lambda: humanize_timestamp("2019-05-21T10:00:00Z"),
+        f"_process_repo_node x{len(nodes)}": process_nodes,
+    }
+    return {name: measure(fn, repeat) for name, fn in cases.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for name, stats in run(args.repeat).items():
+        print(format_row(name, stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Минификация HTML на каждом ответе (MINIFY_MODE=response, Flask-Minify)
+против минификации шаблонов при компиляции (MINIFY_MODE=templates, см.
+template_minify.py) и без минификации (off): время ответа и размер страниц.
+
+    python -m benchmarks.minify [--repeat 200]
+
+Каждый режим запускается в отдельном процессе (режим читается при импорте
+settings). Первый запрос включает компиляцию шаблонов, остальные - нет.
+"miss" - запросы с очищенным кэшем Flask-Minify: так его видят карточки,
+у которых содержимое меняется, и любая страница после 200 других.
+Текст страниц (без <script>/<style> и без пробелов: их режимы убирают
+по-разному) во всех режимах сравнивается - минификация не должна его менять.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.load import BENCH_SECRETS
+
+ROOT = Path(__file__).resolve().parent.parent
+MODES = ("response", "templates", "off")
+
+# Выполняется в дочернем процессе; результат - JSON последней строкой stdout
+CHILD = """
+import hashlib, json, statistics, sys, time
+
+from bs4 import BeautifulSoup
+
+from export import page_paths
+from main import create_app
+
+repeat = int(sys.argv[1])
+app = create_app()
+client = app.test_client()
+# Flask-Minify регистрирует свой after_request-метод; в других режимах его нет
+minifiers = [
+    func.__self__
+    for func in app.after_request_funcs.get(None, [])
+    if hasattr(getattr(func, "__self__", None), "cache")
+]
+
+
+def timings(clear):
+    times = []
+    for _ in range(repeat):
+        if clear:
+            for minifier in minifiers:
+                minifier.cache.clear()
+        start = time.perf_counter()
+        client.get(path).get_data()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+result = {}
+for path in page_paths():
+    if path != "/experience" and not path.startswith("/papers/"):
+        continue
+    start = time.perf_counter()
+    body = client.get(path).get_data()
+    first = (time.perf_counter() - start) * 1000
+    times = timings(clear=False)
+    misses = timings(clear=True)
+    soup = BeautifulSoup(body, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    text = "".join(soup.get_text().split())
+    result[path] = {
+        "first_ms": first,
+        "median_ms": statistics.median(times),
+        "p95_ms": sorted(times)[int(len(times) * 0.95) - 1],
+        "miss_median_ms": statistics.median(misses),
+        "bytes": len(body),
+        "text_sha1": hashlib.sha1(text.encode()).hexdigest(),
+    }
+print(json.dumps(result))
+"""
+
+
+def run_mode(mode: str, repeat: int, env: Dict[str, str]) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, str(repeat)],
+        cwd=ROOT,
+        env={**os.environ, **env, "MINIFY_MODE": mode},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result: Dict[str, Any] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result
+
+
+def run(repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets = Path(tmp) / "secrets.json"
+        secrets.write_text(json.dumps(BENCH_SECRETS), encoding="utf-8")
+        env = {
+            "SECRETS_PATH": str(secrets),
+            "SHARED_CACHE_DIR": tmp,
+            "PREFETCH_IN_PROCESS": "0",
+            # байткод одного режима не должен ускорять компиляцию в другом
+            "JINJA_BYTECODE_DIR": "",
+        }
+        for mode in MODES:
+            results[mode] = run_mode(mode, repeat, env)
+
+    mismatched: List[str] = [
+        path
+        for path, page in results[MODES[0]].items()
+        if any(results[mode][path]["text_sha1"] != page["text_sha1"] for mode in MODES[1:])
+    ]
+    if mismatched:
+        raise AssertionError(f"текст страниц отличается между режимами: {mismatched}")
+    return results
+
+
+def format_result(results: Dict[str, Any]) -> str:
+    lines = []
+    for path in results[MODES[0]]:
+        lines.append(path)
+        for mode in MODES:
+            page = results[mode][path]
+            lines.append(
+                f"  {mode:<10} first {page['first_ms']:7.1f} ms   "
+                f"median {page['median_ms']:6.2f} ms   p95 {page['p95_ms']:6.2f} ms   "
+                f"miss {page['miss_median_ms']:6.2f} ms   "
+                f"{page['bytes']:7d} B"
+            )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    print(format_result(run(args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
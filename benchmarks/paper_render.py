@@ -0,0 +1,45 @@
+"""
+Сравнение рендера статей: markdown + BeautifulSoup (wrap_images)
+против PswpGalleryExtension.
+
+    python -m benchmarks.paper_render
+"""
+
+import argparse
+
+from benchmarks.common import format_row, measure
+from papers import list_papers
+from pswp import wrap_images
+from tools import render_md
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for slug, md_path in list_papers():
+        md = md_path.read_text(encoding="utf-8")
+
+        old = wrap_images(render_md(md))
+        new = str(render_md(md, gallery=True))
+        if old != new:
+            raise SystemExit(f"{slug}: вывод расширения отличается от wrap_images")
+
+        print(f"{slug} ({len(md)} байт markdown)")
+        print(
+            format_row(
+                "  render_md + wrap_images",
+                measure(lambda: wrap_images(render_md(md)), args.repeat),
+            )
+        )
+        print(
+            format_row(
+                "  render_md(gallery=True)",
+                measure(lambda: render_md(md, gallery=True), args.repeat),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Холодный старт воркера: import main + create_app() в новом процессе
+(python -X importtime), память процесса после него и время первого запроса
+к страницам, которым нужны отложенные импорты (markdown, Pillow, bs4).
+
+    python -m benchmarks.startup [--repeat 5] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.load import BENCH_SECRETS
+
+ROOT = Path(__file__).resolve().parent.parent
+PATHS = ["/", "/experience", "/papers/pikabu"]
+
+# Выполняется в дочернем процессе; результат - JSON последней строкой stdout
+CHILD = """
+import json, resource, sys, time
+
+def rss_mb():
+    # ru_maxrss в Linux в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+from main import create_app
+app = create_app()
+result = {"boot_ms": (time.perf_counter() - start) * 1000, "rss_mb": rss_mb(), "first_ms": {}}
+
+client = app.test_client()
+for path in sys.argv[1:]:
+    start = time.perf_counter()
+    client.get(path)
+    result["first_ms"][path] = (time.perf_counter() - start) * 1000
+result["rss_after_mb"] = rss_mb()
+result["modules"] = len(sys.modules)
+print(json.dumps(result))
+"""
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Время импорта main и его прямых импортов (cumulative, мс) из вывода
+    -X importtime, по убыванию.
+    """
+    total = 0.0
+    children: List[Tuple[str, float]] = []
+    # модуль выводится после всех своих импортов, так что прямые импорты main -
+    # строки уровня 1 между ним и предыдущей строкой уровня 0
+    pending: List[Tuple[str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, field = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # заголовок
+        depth = (len(field) - len(field.lstrip()) - 1) // 2
+        name = field.strip()
+        ms = int(cumulative) / 1000
+        if depth == 0:
+            if name == "main":
+                total, children = ms, pending
+            pending = []
+        elif depth == 1:
+            pending.append((name, ms))
+    return total, sorted(children, key=lambda item: -item[1])
+
+
+def start_once(env: Dict[str, str]) -> Tuple[Dict[str, Any], float, List[Tuple[str, float]]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, *PATHS],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result: Dict[str, Any] = json.loads(proc.stdout.strip().splitlines()[-1])
+    total, children = parse_importtime(proc.stderr)
+    return result, total, children
+
+
+def run(repeat: int, top: int = 10) -> Dict[str, Any]:
+    runs: List[Dict[str, Any]] = []
+    import_ms: List[float] = []
+    children: List[Tuple[str, float]] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets = Path(tmp) / "secrets.json"
+        secrets.write_text(json.dumps(BENCH_SECRETS), encoding="utf-8")
+        env = {"SECRETS_PATH": str(secrets), "SHARED_CACHE_DIR": tmp, "PREFETCH_IN_PROCESS": "0"}
+        for _ in range(repeat):
+            result, total, children = start_once(env)
+            runs.append(result)
+            import_ms.append(total)
+
+    return {
+        "import_main_ms": statistics.median(import_ms),
+        "boot_ms": statistics.median(r["boot_ms"] for r in runs),
+        "rss_mb": statistics.median(r["rss_mb"] for r in runs),
+        "rss_after_requests_mb": statistics.median(r["rss_after_mb"] for r in runs),
+        "modules": runs[-1]["modules"],
+        "first_request_ms": {
+            path: statistics.median(r["first_ms"][path] for r in runs) for path in PATHS
+        },
+        "top_imports_ms": dict(children[:top]),
+    }
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    lines = [
+        f"import main         {result['import_main_ms']:8.1f} ms",
+        f"import + create_app {result['boot_ms']:8.1f} ms   RSS {result['rss_mb']:6.1f} MB",
+    ]
+    for path, ms in result["first_request_ms"].items():
+        lines.append(f"first GET {path:<18} {ms:8.1f} ms")
+    lines.append(f"RSS после запросов  {result['rss_after_requests_mb']:6.1f} MB")
+    for name, ms in result["top_imports_ms"].items():
+        lines.append(f"  {name:<24} {ms:8.1f} ms")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="сколько импортов main показать")
+    args = parser.parse_args()
+    print(format_result(run(args.repeat, args.top)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from aiohttp import web
+
+Handler = Callable[[web.Request], Any]
+
+
+class StubServer:
+    """
+    Локальный aiohttp-сервер, подменяющий upstream в бенчмарках.
+    Считает запросы и TCP-соединения (каждое новое соединение = handshake),
+    умеет добавлять задержку к каждому ответу.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.requests = 0
+        self.peers: Set[Tuple[str, int]] = set()
+        self.app = web.Application(middlewares=[self._middleware])
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        self.requests += 1
+        peer = request.transport.get_extra_info("peername") if request.transport else None
+        if peer is not None:
+            self.peers.add((peer[0], peer[1]))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response: web.StreamResponse = await handler(request)
+        return response
+
+    @property
+    def connections(self) -> int:
+        return len(self.peers)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.peers.clear()
+
+    def add_json(self, method: str, path: str, payload: Dict[str, Any]) -> None:
+        async def handler(request: web.Request) -> web.Response:
+            return web.json_response(payload)
+
+        self.app.router.add_route(method, path, handler)
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,92 @@
+"""
+Полный прогон: микробенчмарки, холодный старт, режимы минификации HTML,
+нагрузочный тест и прогрев в мастере gunicorn, результат в JSON для
+сравнения между коммитами.
+
+    python -m benchmarks.suite [--output build/bench/<время>.json] [--skip-load]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from benchmarks import load, micro, minify, startup, warmup
+from benchmarks.common import format_row
+
+BENCH_DIR = Path("build/bench")
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--startup-repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--skip-load", action="store_true")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args": {k: str(v) for k, v in vars(args).items()},
+    }
+
+    results["micro"] = micro.run(args.repeat)
+    for name, stats in results["micro"].items():
+        print(format_row(name, stats), file=sys.stderr)
+
+    results["startup"] = startup.run(args.startup_repeat)
+    print(startup.format_result(results["startup"]), file=sys.stderr)
+
+    results["minify"] = minify.run(args.repeat)
+    print(minify.format_result(results["minify"]), file=sys.stderr)
+
+    if not args.skip_load:
+        results["load"] = asyncio.run(
+            load.run(
+                args.requests,
+                args.concurrency,
+                args.workers,
+                args.threads,
+                args.latency,
+                args.server,
+            )
+        )
+        for path in load.PATHS:
+            print(load.format_result(path, results["load"][path]), file=sys.stderr)
+
+        results["warmup"] = asyncio.run(
+            warmup.run(args.workers, args.threads, args.requests, args.latency)
+        )
+        for name, result in results["warmup"].items():
+            print(warmup.format_result(name, result), file=sys.stderr)
+
+    output = args.output or BENCH_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"-> {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Заглушки Steam Web API и GitHub GraphQL, отдающие сохранённые ответы
+из benchmarks/fixtures. Приложение направляется на них переменными
+окружения STEAM_API и GITHUB_GRAPHQL_URL (см. upstream_env).
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from aiohttp import web
+
+from benchmarks.stub_server import StubServer
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+STEAM_METHODS = {
+    "GetPlayerSummaries": "/ISteamUser/GetPlayerSummaries/v1",
+    "GetBadges": "/IPlayerService/GetBadges/v1",
+    "GetOwnedGames": "/IPlayerService/GetOwnedGames/v1",
+}
+GRAPHQL_PATH = "/graphql"
+
+
+def load_fixture(name: str) -> Any:
+    with open(FIXTURES_DIR / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def upstream_stub(latency: float = 0.0) -> StubServer:
+    """Один stub-сервер на оба API: пути Steam и POST /graphql не пересекаются."""
+    server = StubServer(latency=latency)
+    for method, path in STEAM_METHODS.items():
+        server.add_json("GET", path, load_fixture(f"steam/{method}.json"))
+
+    graphql = load_fixture("github/graphql.json")
+
+    async def handle_graphql(request: web.Request) -> web.Response:
+        # все страницы умещаются в первый запрос, так что ответ один на любой query
+        await request.json()
+        return web.json_response(graphql)
+
+    server.app.router.add_post(GRAPHQL_PATH, handle_graphql)
+    return server
+
+
+def upstream_env(server: StubServer) -> Dict[str, str]:
+    return {"STEAM_API": server.url, "GITHUB_GRAPHQL_URL": server.url + GRAPHQL_PATH}
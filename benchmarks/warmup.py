@@ -0,0 +1,155 @@
+"""
+Прогрев в мастере gunicorn (WARMUP=1, см. gunicorn.conf.py) против загрузки
+в каждом воркере (WARMUP=0): память воркеров сразу после старта и после
+запросов ко всем страницам, время первых запросов.
+
+    python -m benchmarks.warmup [--workers 4] [--requests 200]
+
+Pss делит общие страницы между процессами: сумма Pss воркеров - сколько
+памяти они занимают на самом деле, Private - сколько воркер не делит
+с мастером.
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import aiohttp
+
+from benchmarks.load import BENCH_SECRETS, HEADERS, PATHS, free_port, hammer, start_app
+from benchmarks.upstreams import upstream_env, upstream_stub
+from warmup import memory_usage
+
+
+def worker_pids(master: int) -> List[int]:
+    try:
+        with open(f"/proc/{master}/task/{master}/children", encoding="ascii") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def wait_workers(master: int, port: int, workers: int, timeout: float = 60.0) -> None:
+    """Ждёт, пока мастер слушает порт и запустил все воркеры."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if len(worker_pids(master)) >= workers:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                pass
+        time.sleep(0.05)
+    raise RuntimeError(f"gunicorn не запустил {workers} воркеров за {timeout} с")
+
+
+def workers_memory(master: int) -> Dict[str, Any]:
+    per_worker = [memory_usage(str(pid)) for pid in worker_pids(master)]
+    return {
+        "workers": per_worker,
+        "pss_total_mb": sum(usage.get("Pss", 0.0) for usage in per_worker),
+        "private_total_mb": sum(
+            usage.get("Private_Clean", 0.0) + usage.get("Private_Dirty", 0.0)
+            for usage in per_worker
+        ),
+    }
+
+
+async def first_requests(
+    session: aiohttp.ClientSession, base: str, concurrency: int
+) -> Dict[str, float]:
+    """Самый долгий из concurrency одновременных первых запросов к каждому пути, мс."""
+
+    async def one(path: str) -> float:
+        start = time.perf_counter()
+        async with session.get(base + path, headers=HEADERS) as resp:
+            await resp.read()
+        return (time.perf_counter() - start) * 1000
+
+    result: Dict[str, float] = {}
+    for path in PATHS:
+        result[path] = max(await asyncio.gather(*(one(path) for _ in range(concurrency))))
+    return result
+
+
+async def run_mode(
+    warmup: bool, workers: int, threads: int, requests: int, latency: float
+) -> Dict[str, Any]:
+    stub = upstream_stub(latency=latency)
+    await stub.start()
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets = Path(tmp) / "secrets.json"
+        secrets.write_text(json.dumps(BENCH_SECRETS), encoding="utf-8")
+        env = {
+            **upstream_env(stub),
+            "SECRETS_PATH": str(secrets),
+            "SHARED_CACHE_DIR": tmp,
+            "PREFETCH_IN_PROCESS": "0",
+            "WARMUP": "1" if warmup else "0",
+            "WARMUP_BASE_URL": base + "/",
+        }
+        started = time.perf_counter()
+        app = start_app(env, port, workers, threads)
+        session = aiohttp.ClientSession(auto_decompress=False)
+        try:
+            wait_workers(app.pid, port, workers)
+            result: Dict[str, Any] = {"boot_ms": (time.perf_counter() - started) * 1000}
+            # воркеры могут ещё создавать приложение (WARMUP=0)
+            await asyncio.sleep(1.0)
+            result["memory_started"] = workers_memory(app.pid)
+            result["first_request_ms"] = await first_requests(session, base, workers * threads)
+            for path in PATHS:
+                await hammer(session, base + path, requests, workers * threads)
+            result["memory_after_requests"] = workers_memory(app.pid)
+            return result
+        finally:
+            await session.close()
+            app.terminate()
+            app.wait(timeout=10)
+            await stub.stop()
+
+
+async def run(workers: int, threads: int, requests: int, latency: float) -> Dict[str, Any]:
+    return {
+        "warmup": await run_mode(True, workers, threads, requests, latency),
+        "no_warmup": await run_mode(False, workers, threads, requests, latency),
+    }
+
+
+def format_result(name: str, result: Dict[str, Any]) -> str:
+    lines = [f"{name}: gunicorn готов за {result['boot_ms']:.0f} ms"]
+    for stage in ("memory_started", "memory_after_requests"):
+        memory = result[stage]
+        lines.append(
+            f"  {stage:<22} Pss {memory['pss_total_mb']:7.1f} MB   "
+            f"Private {memory['private_total_mb']:7.1f} MB   "
+            f"(воркеров: {len(memory['workers'])})"
+        )
+    for path, ms in result["first_request_ms"].items():
+        lines.append(f"  first GET {path:<18} {ms:8.1f} ms")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка заглушек, с")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.workers, args.threads, args.requests, args.latency))
+    for name, result in results.items():
+        print(format_result(name, result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+import rcssmin
+from jsmin import jsmin
+
+from assets import ASSETS_DIR, BUNDLES, MANIFEST_NAME, STATIC_ROOT
+from content_encoding import COMPRESSED_DIR, SUFFIXES, precompress_tree
+
+EXTENSIONS = (".css", ".js")
+# Сколько сборок хранить: старые страницы в браузерах и кэшах ссылаются на
+# прежние хэшированные файлы, так что они удаляются не сразу
+KEEP_BUILDS = 3
+
+
+def minify(name: str, source: str) -> str:
+    if ".min." in name:
+        return source
+    # те же настройки, что у Flask-Minify
+    if name.endswith(".css"):
+        return str(rcssmin.cssmin(source, keep_bang_comments=False))
+    return str(jsmin(source, quote_chars="'\"`"))
+
+
+def _hashed_name(name: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def _write(out_dir: Path, name: str, text: str) -> str:
+    data = text.encode("utf-8")
+    hashed = _hashed_name(name, data)
+    path = out_dir / hashed
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return hashed
+
+
+def _sources(static_root: Path) -> List[str]:
+    return sorted(
+        p.relative_to(static_root).as_posix()
+        for p in static_root.rglob("*")
+        if p.is_file() and p.suffix in EXTENSIONS
+    )
+
+
+def _previous_builds(manifest: Path) -> List[List[str]]:
+    """Файлы прошлых сборок из манифеста, начиная с последней."""
+    try:
+        with open(manifest, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [sorted(data.get("files", {}).values())] + list(data.get("previous", []))
+
+
+def _prune(out_dir: Path, keep: Set[str]) -> int:
+    """Удаляет хэшированные файлы (и их .br/.gz), которых нет в keep."""
+    removed = 0
+    for path in out_dir.rglob("*"):
+        if not path.is_file() or path.name == MANIFEST_NAME:
+            continue
+        name = path.relative_to(out_dir).as_posix()
+        for suffix in SUFFIXES.values():
+            name = name.removesuffix(suffix)
+        if name not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def build_assets(
+    static_root: Path = STATIC_ROOT, out_dir: Path = ASSETS_DIR, keep_builds: int = KEEP_BUILDS
+) -> Dict[str, str]:
+    """
+    Минифицирует CSS/JS, собирает бандлы и пишет манифест. Новые файлы
+    пишутся рядом со старыми; удаляются только файлы, которые не нужны ни
+    этой сборке, ни keep_builds - 1 предыдущим.
+    """
+    manifest = out_dir / MANIFEST_NAME
+    previous = _previous_builds(manifest)[: max(keep_builds - 1, 0)]
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    minified: Dict[str, str] = {}
+    files: Dict[str, str] = {}
+    for name in _sources(static_root):
+        minified[name] = minify(name, (static_root / name).read_text(encoding="utf-8"))
+        files[name] = _write(out_dir, name, minified[name])
+
+    for bundle, sources in BUNDLES.items():
+        separator = "\n" if bundle.endswith(".css") else ";\n"
+        files[bundle] = _write(out_dir, bundle, separator.join(minified[s] for s in sources))
+
+    data = {"files": files, "previous": previous}
+    tmp = manifest.with_name(manifest.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, manifest)
+
+    _prune(out_dir, set(files.values()).union(*previous))
+    return files
+
+
+def precompress_all(
+    static_root: Path = STATIC_ROOT,
+    out_dir: Path = ASSETS_DIR,
+    compressed_dir: Path = COMPRESSED_DIR,
+) -> int:
+    """Пишет .br/.gz рядом с файлами build/assets и копии для static/ в build/compressed."""
+    if compressed_dir.exists():
+        shutil.rmtree(compressed_dir)
+    return precompress_tree(out_dir, out_dir) + precompress_tree(
+        static_root, compressed_dir / "static"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Минифицирует и хэширует CSS/JS из static/ в build/assets"
+    )
+    parser.add_argument("--static", type=Path, default=STATIC_ROOT)
+    parser.add_argument("--out", type=Path, default=ASSETS_DIR)
+    parser.add_argument("--compressed", type=Path, default=COMPRESSED_DIR)
+    args = parser.parse_args()
+
+    files = build_assets(args.static, args.out)
+    before = sum((args.static / n).stat().st_size for n in files if n not in BUNDLES)
+    after = sum((args.out / files[n]).stat().st_size for n in files if n not in BUNDLES)
+    print(f"{len(files)} файлов, {before} -> {after} байт", file=sys.stderr)
+
+    count = precompress_all(args.static, args.out, args.compressed)
+    print(f"{count} сжатых копий (.br/.gz)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from background import submit
+from shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+def sizeof(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class ByteLRUCache(Generic[V]):
+    """
+    LRU-кэш с ограничением по суммарному размеру значений в байтах.
+    Считает попадания и промахи.
+    """
+
+    def __init__(self, max_bytes: int, size_of: Callable[[V], int] = sizeof) -> None:
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._data: "OrderedDict[Hashable, Tuple[V, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, validate: Optional[Callable[[V], bool]] = None) -> Optional[V]:
+        """
+        Возвращает значение или None. Если передан validate и он вернул False,
+        запись считается устаревшей, удаляется и засчитывается как промах.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and validate is not None and not validate(item[0]):
+                del self._data[key]
+                self._size -= item[1]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: V) -> None:
+        size = self.size_of(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._size -= evicted
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._data),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SWRCache(Generic[V]):
+    """
+    Кэш async-функции в режиме stale-while-revalidate.
+
+    - моложе stale_ttl: значение отдаётся из кэша;
+    - от stale_ttl до expire_ttl: отдаётся старое значение, а в фоне
+      запускается одно обновление;
+    - старше expire_ttl или нет значения: запрос ждёт обновления; если оно
+      упало, а старое значение есть, отдаётся оно.
+
+    Одновременные обновления одного ключа склеиваются в один вызов.
+    Обновления выполняются в фоновом loop'е (см. background.py), поэтому
+    переживают временный loop запроса Flask.
+
+    С backend (SharedCache) значения делятся между процессами: перед походом
+    в upstream проверяется общий кэш, а обновлять ключ может только процесс,
+    взявший его аренду; остальные ждут его результата.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., Awaitable[V]],
+        stale_ttl: float,
+        expire_ttl: float,
+        backend: Optional[SharedCache] = None,
+        lease: float = 60.0,
+    ) -> None:
+        self.fn = fn
+        self.stale_ttl = stale_ttl
+        self.expire_ttl = max(expire_ttl, stale_ttl)
+        self.backend = backend
+        self.lease = lease
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[V, float]] = {}
+        self._inflight: Dict[Hashable, "concurrent.futures.Future[V]"] = {}
+        self._lock = threading.Lock()
+        functools.update_wrapper(self, fn)
+
+    @staticmethod
+    def _key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+        return args + tuple(sorted(kwargs.items()))
+
+    def _shared_key(self, key: Hashable) -> str:
+        # аргументы (например, токен GitHub) не должны попасть в файл как есть
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return f"{self.fn.__module__}.{self.fn.__qualname__}:{digest}"
+
+    async def _fetch_shared(
+        self,
+        backend: SharedCache,
+        key: Hashable,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        max_age: float,
+    ) -> Tuple[V, float]:
+        skey = self._shared_key(key)
+        deadline = time.time() + self.lease
+        # SQLite может ждать блокировку до busy_timeout: не в потоке loop'а
+        while True:
+            entry = await asyncio.to_thread(backend.get, skey)
+            if entry is not None and time.time() - entry[1] < max_age:
+                return entry
+
+            if await asyncio.to_thread(backend.acquire, skey, self.lease):
+                try:
+                    value = await self.fn(*args, **kwargs)
+                    fetched_at = time.time()
+                    await asyncio.to_thread(backend.set, skey, value, fetched_at, self.expire_ttl)
+                    return value, fetched_at
+                finally:
+                    await asyncio.to_thread(backend.release, skey)
+
+            # ключ обновляет другой процесс: устаревшее значение лучше ожидания
+            if entry is not None:
+                return entry
+            if time.time() > deadline:
+                value = await self.fn(*args, **kwargs)
+                return value, time.time()
+            await asyncio.sleep(0.2)
+
+    async def _fetch(
+        self, key: Hashable, args: Tuple[Any, ...], kwargs: Dict[str, Any], max_age: float
+    ) -> V:
+        try:
+            current = self._entries.get(key)
+            if current is not None and time.time() - current[1] < max_age:
+                return current[0]
+
+            if self.backend is not None:
+                value, fetched_at = await self._fetch_shared(
+                    self.backend, key, args, kwargs, max_age
+                )
+            else:
+                value, fetched_at = await self.fn(*args, **kwargs), time.time()
+            with self._lock:
+                current = self._entries.get(key)
+                if current is None or current[1] <= fetched_at:
+                    self._entries[key] = (value, fetched_at)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _log_failure(self, fut: "concurrent.futures.Future[V]") -> None:
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.warning("%s: обновление не удалось: %r", self.fn.__name__, fut.exception())
+
+    def _start(
+        self, args: Tuple[Any, ...], kwargs: Dict[str, Any], max_age: float
+    ) -> "concurrent.futures.Future[V]":
+        key = self._key(args, kwargs)
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is None:
+                fut = submit(self._fetch(key, args, kwargs, max_age))
+                fut.add_done_callback(self._log_failure)
+                self._inflight[key] = fut
+            return fut
+
+    def refresh(self, *args: Any, **kwargs: Any) -> "concurrent.futures.Future[V]":
+        """Запускает обновление ключа (или возвращает уже идущее)."""
+        return self._start(args, kwargs, self.stale_ttl)
+
+    def prefetch(self, max_age: float, *args: Any, **kwargs: Any) -> "concurrent.futures.Future[V]":
+        """
+        Обновляет ключ заранее, даже если он ещё свежий. Значение моложе
+        max_age (своё или из общего кэша) считается достаточно новым.
+        """
+        return self._start(args, kwargs, max_age)
+
+    def fetched_at(self, *args: Any, **kwargs: Any) -> Optional[float]:
+        """Время (unix) получения закэшированного значения или None."""
+        entry = self._entries.get(self._key(args, kwargs))
+        return entry[1] if entry is not None else None
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> V:
+        entry = self._entries.get(self._key(args, kwargs))
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.stale_ttl:
+                with self._lock:
+                    self.hits += 1
+                return value
+            if age < self.expire_ttl:
+                with self._lock:
+                    self.stale_hits += 1
+                self.refresh(*args, **kwargs)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        try:
+            return await asyncio.wrap_future(self.refresh(*args, **kwargs))
+        except Exception:
+            # upstream лежит: даже сильно устаревшие данные лучше страницы 500
+            if entry is not None:
+                return entry[0]
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+            }
+
+
+def swr_cache(
+    stale_ttl: float,
+    expire_ttl: float,
+    backend: Optional[SharedCache] = None,
+    lease: float = 60.0,
+) -> Callable[[Callable[..., Awaitable[V]]], SWRCache[V]]:
+    def decorator(fn: Callable[..., Awaitable[V]]) -> SWRCache[V]:
+        return SWRCache(fn, stale_ttl, expire_ttl, backend, lease)
+
+    return decorator
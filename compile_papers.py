@@ -0,0 +1,91 @@
+import argparse
+import hashlib
+import html as html_lib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from image_index import IMAGE_INDEX
+from papers import (
+    COMPILED_DIR,
+    MANIFEST_NAME,
+    PAPERS_DIR,
+    content_hash,
+    image_paths,
+    list_papers,
+    variant_settings,
+)
+from tools import render_md
+
+H1_RE = re.compile(r"<h1[^>]*>(.*?)</h1>", re.S)
+TAG_RE = re.compile(r"<[^>]+>")
+WORD_RE = re.compile(r"\w+")
+
+
+def _text(html: str) -> str:
+    return html_lib.unescape(TAG_RE.sub(" ", html))
+
+
+def _write_atomic(path: Path, data: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def compile_paper(slug: str, md_path: Path, out_dir: Path) -> Dict[str, Any]:
+    source = md_path.read_bytes()
+    html = render_md(source.decode("utf-8"), gallery=True)
+
+    title_match = H1_RE.search(html)
+    title = _text(title_match.group(1)).strip() if title_match else slug
+
+    images = []
+    for path in image_paths(html):
+        info = IMAGE_INDEX.get(path)
+        if info is not None:
+            images.append({"path": path, "width": info.width, "height": info.height})
+
+    fragment = f"{slug}.html"
+    _write_atomic(out_dir / fragment, html)
+
+    return {
+        "slug": slug,
+        "title": title,
+        "word_count": len(WORD_RE.findall(_text(html))),
+        "images": images,
+        "fragment": fragment,
+        "source_hash": hashlib.sha256(source).hexdigest(),
+        "variants": variant_settings(),
+        "content_hash": content_hash(html),
+    }
+
+
+def compile_papers(papers_dir: Path = PAPERS_DIR, out_dir: Path = COMPILED_DIR) -> List[dict]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    entries = [compile_paper(slug, md, out_dir) for slug, md in list_papers(papers_dir)]
+    manifest = json.dumps({"papers": entries}, ensure_ascii=False, indent=2)
+    _write_atomic(out_dir / MANIFEST_NAME, manifest)
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Заранее рендерит static/papers/*/paper.md в HTML-фрагменты"
+    )
+    parser.add_argument("--papers-dir", type=Path, default=PAPERS_DIR)
+    parser.add_argument("--out", type=Path, default=COMPILED_DIR)
+    args = parser.parse_args()
+
+    for entry in compile_papers(args.papers_dir, args.out):
+        print(
+            f"{entry['slug']}: {entry['word_count']} слов, "
+            f"{len(entry['images'])} картинок, {entry['content_hash'][:12]}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import functools
+import hashlib
+import os
+from typing import Any, Optional
+
+from flask import Response, make_response, request
+
+from content_encoding import ResponseCompressor
+
+
+def strong_etag(*parts: Any) -> str:
+    """ETag из входов страницы: одинаковые входы дают одинаковый HTML."""
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _templates_hash(folder: str) -> str:
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            digest.update(os.path.relpath(path, folder).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+_cached_templates_hash = functools.lru_cache(maxsize=None)(_templates_hash)
+
+
+def templates_hash(folder: str, auto_reload: bool = False) -> str:
+    """
+    Хэш всех шаблонов: в страницу любой из них может попасть через extends
+    и include. Без auto_reload Flask не перечитывает шаблоны до перезапуска,
+    поэтому хэш считается один раз.
+    """
+    if auto_reload:
+        return _templates_hash(folder)
+    return _cached_templates_hash(folder)
+
+
+def not_modified(etag: str, compressor: Optional[ResponseCompressor] = None) -> Optional[Response]:
+    """
+    Ответ 304, если у клиента уже есть эта версия страницы, иначе None.
+    Сравнивается только ETag представления, которое получил бы этот запрос:
+    compressor дописывает к ETag кодирование, выбранное по Accept-Encoding.
+    """
+    tag = compressor.representation_etag(etag) if compressor is not None else etag
+    if not request.if_none_match.contains(tag):
+        return None
+    response = Response(status=304)
+    response.set_etag(tag)
+    return response
+
+
+def with_etag(body: str, etag: str) -> Response:
+    response = make_response(body)
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from image_index import IMAGE_INDEX
+from image_variants import IMAGE_VARIANTS
+from metrics import timed
+from tools import plural_ru
+
+INFO_PANEL_PATH = Path("configs/info_panel.json")
+NAVIGATION_PATH = Path("configs/navigation.json")
+STATIC_ROOT = Path("static")
+
+
+def get_size(path: str, static_root: Path = STATIC_ROOT) -> List[int]:
+    info = IMAGE_INDEX.get(os.path.join(static_root, path))
+    if info is None:
+        return [200, 200]
+
+    w, h = info.width, info.height
+
+    min_size = 200
+    if w < min_size or h < min_size:
+        scale = max(min_size / w, min_size / h)
+        w = int(round(w * scale))
+        h = int(round(h * scale))
+
+    return [w, h]
+
+
+def _read_json(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _validate_info_panel(info_bar: Any) -> None:
+    if not isinstance(info_bar, dict):
+        raise ValueError("info_panel.json: ожидается объект")
+    for key in ("age", "avatar"):
+        if key not in info_bar:
+            raise ValueError(f"info_panel.json: отсутствует ключ {key!r}")
+    try:
+        datetime.strptime(info_bar["age"], "%Y-%m-%d")
+    except (TypeError, ValueError) as e:
+        raise ValueError("info_panel.json: 'age' должен быть в формате YYYY-MM-DD") from e
+    avatar = info_bar["avatar"]
+    if not isinstance(avatar, dict) or "url" not in avatar:
+        raise ValueError("info_panel.json: 'avatar.url' обязателен")
+    if not all(isinstance(i, dict) and "url" in i for i in avatar.get("extra", [])):
+        raise ValueError("info_panel.json: у каждого 'avatar.extra' должен быть 'url'")
+
+
+def _validate_navigation(navigation: Any) -> None:
+    if not isinstance(navigation, list):
+        raise ValueError("navigation.json: ожидается список")
+    for item in navigation:
+        if not isinstance(item, dict) or "title" not in item:
+            raise ValueError("navigation.json: у каждого пункта должен быть 'title'")
+
+
+def _age_word(birth: date, today: date) -> str:
+    age = today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
+    return plural_ru(age, "год", "года", "лет")
+
+
+class ConfigStore:
+    """
+    Хранит распарсенные info_panel.json и navigation.json вместе с посчитанными
+    размерами аватарок. Файлы перечитываются только при изменении mtime,
+    а возраст пересчитывается только при смене даты.
+    """
+
+    def __init__(
+        self,
+        info_panel_path: Path = INFO_PANEL_PATH,
+        navigation_path: Path = NAVIGATION_PATH,
+        static_root: Path = STATIC_ROOT,
+    ) -> None:
+        self.info_panel_path = info_panel_path
+        self.navigation_path = navigation_path
+        self.static_root = static_root
+
+        self._lock = threading.Lock()
+        self._mtimes: Optional[Tuple[float, float]] = None
+        self._info_panel: Dict[str, Any] = {}
+        self._navigation: List[Dict[str, Any]] = []
+        self._birth: Optional[date] = None
+        self._context_date: Optional[date] = None
+        self._context: Dict[str, Any] = {}
+
+    def _current_mtimes(self) -> Tuple[float, float]:
+        return (
+            os.stat(self.info_panel_path).st_mtime,
+            os.stat(self.navigation_path).st_mtime,
+        )
+
+    @timed("config_load")
+    def _load(self, mtimes: Tuple[float, float]) -> None:
+        info_bar = _read_json(self.info_panel_path)
+        navigation = _read_json(self.navigation_path)
+        _validate_info_panel(info_bar)
+        _validate_navigation(navigation)
+
+        info_bar["avatar"]["size"] = get_size(info_bar["avatar"]["url"], self.static_root)
+        rel = IMAGE_VARIANTS.relative(self.static_root / info_bar["avatar"]["url"])
+        info_bar["avatar"]["srcset"] = IMAGE_VARIANTS.srcset(rel) if rel is not None else None
+        for i in info_bar["avatar"].get("extra", []):
+            i["size"] = get_size(i["url"], self.static_root)
+
+        self._birth = datetime.strptime(info_bar["age"], "%Y-%m-%d").date()
+        self._info_panel = info_bar
+        self._navigation = navigation
+        self._context_date = None
+        self._mtimes = mtimes
+
+    def load(self) -> None:
+        """Принудительно загружает конфиги (например, при старте приложения)."""
+        with self._lock:
+            self._load(self._current_mtimes())
+
+    def version(self) -> Tuple[float, float, str]:
+        """Всё, от чего зависит context(): mtime конфигов и текущая дата."""
+        return (*self._current_mtimes(), date.today().isoformat())
+
+    def context(self) -> Dict[str, Any]:
+        """Возвращает готовый контекст для шаблонов."""
+        mtimes = self._current_mtimes()
+        today = date.today()
+        if mtimes == self._mtimes and today == self._context_date:
+            return self._context
+
+        with self._lock:
+            if mtimes != self._mtimes:
+                self._load(mtimes)
+
+            if today != self._context_date:
+                assert self._birth is not None
+                info_bar = dict(self._info_panel)
+                info_bar["age"] = _age_word(self._birth, today)
+                self._context = {"info_panel": info_bar, "navigation": self._navigation}
+                self._context_date = today
+
+            return self._context
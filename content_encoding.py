@@ -0,0 +1,188 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+from flask import Response, request, send_file
+from werkzeug.datastructures import Accept
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from cache import ByteLRUCache
+from metrics import timed
+from settings import COMPRESS_CACHE_BYTES
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдаём только gzip
+    brotli = None
+
+COMPRESSED_DIR = Path("build/compressed")
+# Файлы, которые имеет смысл сжимать (картинки и шрифты уже сжаты)
+COMPRESSIBLE = (".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".html", ".md")
+# Ответы меньше этого размера сжимать невыгодно
+MIN_SIZE = 512
+# Максимальное сжатие - для файлов, которые сжимаются один раз при сборке
+BROTLI_QUALITY = 11
+GZIP_LEVEL = 9
+# Страницы сжимаются на пути запроса (и заново при каждом изменении карточки):
+# brotli 11 на них стоит ~100 мс, 5 - ~2 мс при ответе на 10-20% больше
+DYNAMIC_BROTLI_QUALITY = 5
+DYNAMIC_GZIP_LEVEL = 6
+# Расширение файла-соседа для каждого кодирования
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def encodings() -> List[str]:
+    """Поддерживаемые кодирования в порядке предпочтения."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept: Accept) -> Optional[str]:
+    """Выбирает кодирование по Accept-Encoding или None, если подходит только identity."""
+    for encoding in encodings():
+        if accept.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, dynamic: bool = False) -> bytes:
+    """dynamic=True - быстрые настройки для ответов, которые сжимаются при запросе."""
+    if encoding == "br":
+        assert brotli is not None
+        quality = DYNAMIC_BROTLI_QUALITY if dynamic else BROTLI_QUALITY
+        return bytes(brotli.compress(data, quality=quality))
+    # mtime=0: одинаковый вход даёт одинаковый выход
+    level = DYNAMIC_GZIP_LEVEL if dynamic else GZIP_LEVEL
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def precompress(source: Path, target_stem: Path) -> int:
+    """
+    Пишет target_stem.br / target_stem.gz для source, если сжатие даёт выигрыш.
+    Возвращает число записанных файлов.
+    """
+    data = source.read_bytes()
+    if len(data) < MIN_SIZE:
+        return 0
+    written = 0
+    target_stem.parent.mkdir(parents=True, exist_ok=True)
+    for encoding in encodings():
+        packed = compress(data, encoding)
+        if len(packed) >= len(data):
+            continue
+        path = target_stem.with_name(target_stem.name + SUFFIXES[encoding])
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(packed)
+        os.replace(tmp, path)
+        written += 1
+    return written
+
+
+def _compressible(root: Path) -> Iterator[Path]:
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix in COMPRESSIBLE:
+            yield path
+
+
+def precompress_tree(root: Path, out_dir: Path) -> int:
+    """Сжимает все подходящие файлы root в out_dir с той же структурой каталогов."""
+    return sum(precompress(path, out_dir / path.relative_to(root)) for path in _compressible(root))
+
+
+def _sibling(path: str, compressed_dir: str, filename: str) -> Optional[Tuple[str, str]]:
+    """Свежий сжатый вариант файла и его кодирование, если клиент его принимает."""
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return None
+    sibling = safe_join(compressed_dir, filename + SUFFIXES[encoding])
+    if sibling is None:
+        return None
+    try:
+        # файл в static/ поменяли после сборки: его сжатая копия устарела
+        if os.stat(sibling).st_mtime < os.stat(path).st_mtime:
+            return None
+    except OSError:
+        return None
+    return sibling, encoding
+
+
+def send_precompressed(
+    directory: Union[str, Path],
+    filename: str,
+    compressed_dir: Union[str, Path],
+    max_age: Optional[int] = None,
+) -> Response:
+    """
+    send_from_directory, который отдаёт собранный заранее .br/.gz вариант файла
+    из compressed_dir, если клиент его принимает.
+    """
+    path = safe_join(os.fspath(directory), filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    found = _sibling(path, os.fspath(compressed_dir), filename)
+    if found is None:
+        response = send_file(path, max_age=max_age)
+    else:
+        sibling, encoding = found
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_file(sibling, mimetype=mimetype, max_age=max_age)
+        response.headers["Content-Encoding"] = encoding
+
+    if os.path.splitext(filename)[1] in COMPRESSIBLE:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+class ResponseCompressor:
+    """
+    Сжимает HTML-ответы выбранных endpoint'ов. Результат кэшируется по хэшу
+    содержимого, так что одна и та же страница сжимается один раз.
+    """
+
+    def __init__(self, endpoints: Tuple[str, ...], max_bytes: int = COMPRESS_CACHE_BYTES) -> None:
+        self.endpoints = frozenset(endpoints)
+        self.cache: ByteLRUCache[bytes] = ByteLRUCache(max_bytes)
+
+    def representation_etag(self, etag: str) -> str:
+        """ETag того представления, которое получит текущий запрос."""
+        encoding = negotiate(request.accept_encodings)
+        if request.endpoint not in self.endpoints or encoding is None:
+            return etag
+        return f"{etag}-{encoding}"
+
+    def compressed(self, data: bytes, encoding: str) -> bytes:
+        key = (hashlib.sha256(data).digest(), encoding)
+        packed = self.cache.get(key)
+        if packed is None:
+            with timed("compress"):
+                packed = compress(data, encoding, dynamic=True)
+            self.cache.set(key, packed)
+        return packed
+
+    def __call__(self, response: Response) -> Response:
+        if request.endpoint not in self.endpoints or response.mimetype != "text/html":
+            return response
+        response.vary.add("Accept-Encoding")
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        encoding = negotiate(request.accept_encodings)
+        data = response.get_data()
+        if encoding is None or len(data) < MIN_SIZE:
+            return response
+
+        response.set_data(self.compressed(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        # у сжатого представления свой ETag
+        etag, weak = response.get_etag()
+        if etag is not None:
+            response.set_etag(f"{etag}-{encoding}", bool(weak))
+        return response
@@ -0,0 +1,111 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Имена месяцев фиксированы: strftime("%B") зависит от локали процесса
+MONTH_NAMES = (
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+
+YearMonth = Tuple[int, int]
+
+
+def month_key(ym: YearMonth) -> str:
+    return f"{MONTH_NAMES[ym[1] - 1]} {ym[0]}"
+
+
+def _year_month(date_str: str) -> YearMonth:
+    # "YYYY-MM-DD" -> (YYYY, MM) без strptime
+    return int(date_str[:4]), int(date_str[5:7])
+
+
+class ContributionCalendar:
+    """
+    Помесячные суммы contributionCalendar с ключами (год, месяц).
+
+    merge() сравнивает новые дни с сохранёнными и меняет суммы только на
+    разницу, а дни, выпавшие из окна календаря, вычитает. Так при каждом
+    обновлении не нужно пересчитывать весь год.
+    """
+
+    def __init__(self) -> None:
+        # дни в хронологическом порядке: дата -> количество
+        self._days: Dict[str, int] = {}
+        self._totals: Dict[YearMonth, int] = {}
+        self._day_counts: Dict[YearMonth, int] = {}
+
+    def _drop_before(self, first: str) -> None:
+        while self._days:
+            date_str = next(iter(self._days))
+            if date_str >= first:
+                break
+            count = self._days.pop(date_str)
+            ym = _year_month(date_str)
+            self._totals[ym] -= count
+            self._day_counts[ym] -= 1
+            if not self._day_counts[ym]:
+                del self._totals[ym], self._day_counts[ym]
+
+    def merge(self, days: Iterable[Tuple[str, int]]) -> "ContributionCalendar":
+        """Вливает (дата, количество); дни должны идти по возрастанию даты."""
+        first = None
+        for date_str, count in days:
+            if first is None:
+                first = date_str
+                self._drop_before(first)
+
+            old = self._days.get(date_str)
+            if old == count:
+                continue
+
+            ym = _year_month(date_str)
+            if old is None:
+                if self._days and date_str < next(reversed(self._days)):
+                    # вставка в середину: восстанавливаем порядок
+                    self._days = dict(sorted({**self._days, date_str: count}.items()))
+                else:
+                    self._days[date_str] = count
+                self._totals[ym] = self._totals.get(ym, 0) + count
+                self._day_counts[ym] = self._day_counts.get(ym, 0) + 1
+            else:
+                self._days[date_str] = count
+                self._totals[ym] += count - old
+        return self
+
+    def merge_weeks(self, weeks: List[Dict[str, Any]]) -> "ContributionCalendar":
+        """Вливает weeks из ответа GitHub GraphQL."""
+        return self.merge(
+            (day["date"], day["contributionCount"])
+            for week in weeks
+            for day in week["contributionDays"]
+        )
+
+    def monthly(self) -> Dict[str, Any]:
+        """Структура monthly_contributions для шаблона карточки."""
+        months = sorted(self._totals)
+        monthly: Dict[str, Tuple[int, float]] = {}
+        if months:
+            max_total = max(self._totals.values())
+            percent_step = 100 / max_total if max_total else 0.0
+            for ym in months:
+                total = self._totals[ym]
+                monthly[month_key(ym)] = (total, percent_step * total)
+
+        return {
+            "monthly": monthly,
+            "first_month": month_key(months[0]) if months else "",
+            "last_month": month_key(months[-1]) if months else "",
+        }
+
+
+def aggregate_monthly(weeks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return ContributionCalendar().merge_weeks(weeks).monthly()
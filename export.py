@@ -0,0 +1,139 @@
+"""
+Экспорт сайта в статические файлы:
+
+    SITE_URL=https://example.com/ python export.py --out build/site [--cards] [--force]
+
+Страницы рендерятся через тестовый клиент Flask (с минификацией, хэшированными
+ассетами и srcset, как в живом приложении) и кладутся как <путь>/index.html,
+рядом пишутся .br/.gz для gzip_static/brotli_static. Дерево можно отдавать
+nginx'ом напрямую (try_files $uri $uri/index.html =404; error_page 404 /404.html),
+проксируя в приложение только /get/cv/ok и живые /cards/*.
+"""
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+from typing import List
+
+from flask import Flask
+from werkzeug.exceptions import InternalServerError
+
+from assets import ASSETS_DIR
+from content_encoding import COMPRESSED_DIR, precompress
+from image_variants import IMAGE_VARIANTS, VARIANTS_DIR
+from papers import list_papers
+from settings import SITE_URL
+
+SITE_DIR = Path("build/site")
+CARD_PATHS = ["/cards/steam", "/cards/github"]
+# Метка в корне экспорта: только такой каталог можно удалить без --force
+MARKER_NAME = ".site-export"
+
+
+def page_paths(cards: bool = False) -> List[str]:
+    paths = ["/", "/experience", "/get/cv"]
+    paths += [f"/papers/{slug}" for slug, _ in list_papers()]
+    if cards:
+        paths += CARD_PATHS
+    return paths
+
+
+def _target(out_dir: Path, path: str) -> Path:
+    return out_dir / path.strip("/") / "index.html"
+
+
+def _write(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(data)
+    precompress(target, target)
+
+
+def _copy_tree(source: Path, target: Path) -> None:
+    if source.is_dir():
+        shutil.copytree(source, target, dirs_exist_ok=True)
+
+
+def export_pages(app: Flask, out_dir: Path, base_url: str, cards: bool = False) -> int:
+    client = app.test_client()
+    for path in page_paths(cards):
+        response = client.get(path, base_url=base_url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: ответ {response.status_code}")
+        _write(_target(out_dir, path), response.data)
+
+    # 404 как у живого приложения: запрос заведомо несуществующего адреса
+    response = client.get("/__export_404__", base_url=base_url)
+    _write(out_dir / "404.html", response.data)
+
+    # 500 отдаёт nginx, когда приложение недоступно
+    with app.test_request_context(base_url=base_url):
+        handler = app.error_handler_spec[None][500][InternalServerError]
+        rv = app.ensure_sync(handler)(InternalServerError())
+        error_response = app.process_response(app.make_response(rv))
+    _write(out_dir / "500.html", error_response.get_data())
+
+    return len(page_paths(cards)) + 2
+
+
+def export_files(out_dir: Path) -> None:
+    """static/ с готовыми .br/.gz рядом, хэшированные ассеты и варианты картинок."""
+    _copy_tree(Path("static"), out_dir / "static")
+    _copy_tree(COMPRESSED_DIR / "static", out_dir / "static")
+    _copy_tree(ASSETS_DIR, out_dir / "assets")
+    IMAGE_VARIANTS.generate_all()
+    _copy_tree(VARIANTS_DIR, out_dir / "variants")
+    for lock in (out_dir / "variants").rglob("*.lock"):
+        lock.unlink()
+    shutil.copy2(Path("static/robots.txt"), out_dir / "robots.txt")
+
+
+def _can_replace(out_dir: Path) -> bool:
+    """Каталог пуст, не существует или остался от прошлого экспорта."""
+    if not out_dir.exists():
+        return True
+    if not out_dir.is_dir():
+        return False
+    return (out_dir / MARKER_NAME).is_file() or not any(out_dir.iterdir())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Экспортирует сайт в статические файлы")
+    parser.add_argument("--out", type=Path, default=SITE_DIR)
+    parser.add_argument(
+        "--base-url",
+        default=SITE_URL,
+        help="адрес сайта для canonical- и og-ссылок (по умолчанию SITE_URL)",
+    )
+    parser.add_argument("--cards", action="store_true", help="снимок карточек Steam/GitHub")
+    parser.add_argument(
+        "--force", action="store_true", help="удалить --out, даже если это не прошлый экспорт"
+    )
+    args = parser.parse_args()
+
+    if not args.base_url:
+        parser.error("не задан адрес сайта: --base-url или переменная окружения SITE_URL")
+
+    cwd = Path.cwd().resolve()
+    out = args.out.resolve()
+    if out == cwd or out in cwd.parents:
+        parser.error(f"{args.out}: рабочий каталог или его родитель, удалять его нельзя")
+    if not args.force and not _can_replace(args.out):
+        parser.error(f"{args.out} не пуст и не похож на прошлый экспорт; используйте --force")
+
+    from main import create_app
+
+    app = create_app()
+
+    if args.out.exists():
+        shutil.rmtree(args.out)
+    args.out.mkdir(parents=True)
+    (args.out / MARKER_NAME).touch()
+
+    count = export_pages(app, args.out, args.base_url, args.cards)
+    export_files(args.out)
+    print(f"{count} страниц -> {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
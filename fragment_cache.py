@@ -0,0 +1,46 @@
+from typing import Callable, Hashable, List, Optional
+
+from jinja2 import nodes
+from jinja2.environment import Environment
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+
+from cache import ByteLRUCache
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Тег {% cache "name", version %}...{% endcache %}: тело рендерится один
+    раз на каждую пару (name, version), дальше подставляется готовый HTML.
+    Всё, от чего зависит фрагмент, должно входить в version.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment: Environment) -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        args: List[nodes.Expr] = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cache_support", args), [], [], body).set_lineno(
+            lineno
+        )
+
+    def _cache_support(self, name: str, version: Hashable, caller: Callable[[], str]) -> str:
+        cache: Optional[ByteLRUCache[str]] = getattr(self.environment, "fragment_cache", None)
+        if cache is None:
+            return caller()
+        key = (name, version)
+        rv = cache.get(key)
+        if rv is None:
+            rv = caller()
+            cache.set(key, rv)
+        return rv
@@ -1,166 +1,235 @@
-import asyncio
 from collections import defaultdict
-from datetime import datetime
-from typing import Any, Dict, Optional
-
-import aiohttp
-from async_lru import alru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+from cache import swr_cache
+from contributions import ContributionCalendar
+from metrics import timed
+from settings import CARDS_EXPIRE_TTL, CARDS_STALE_TTL, GITHUB_GRAPHQL_URL, SHARED_CACHE_LEASE
+from shared_cache import SHARED_CACHE
 from tools import humanize_timestamp, plural_ru
+from upstream import UpstreamClient, UpstreamError
+
+GITHUB = UpstreamClient("github")
+
+PAGE_SIZE = 100
+# Репозитории организаций запрашиваются вложенно, а стоимость запроса по
+# rate limit растёт как произведение first: держим страницу организаций малой
+ORGS_PAGE_SIZE = 10
+MAX_ROUNDS = 20
+
+PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+RATE_LIMIT = "rateLimit { cost remaining resetAt }"
+
+_CALENDARS: Dict[str, ContributionCalendar] = {}
+
+REPO_FRAGMENT = """
+fragment RepoFields on Repository {
+  name
+  owner { login }
+  description
+  stargazerCount
+  pullRequests(states: OPEN) { totalCount }
+  issues(states: OPEN) { totalCount }
+  isFork
+  viewerPermission
+  languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
+    edges { size node { name } }
+    totalSize
+  }
+}
+"""
+
+PROFILE_SELECTION = """
+  user(login: $login) {
+    login
+    avatarUrl
+    bio
+    createdAt
+    followers { totalCount }
+    contributionsCollection {
+      contributionCalendar {
+        totalContributions
+        weeks { contributionDays { contributionCount date } }
+      }
+    }
+  }
+"""
+
+
+class Page(NamedTuple):
+    """Одна страница connection'а: owned / collab / orgs / org (репозитории организации)."""
+
+    kind: str
+    cursor: Optional[str] = None
+    login: Optional[str] = None
+
+
+def _repositories(args: str, alias: Optional[str] = None) -> str:
+    prefix = f"{alias}: " if alias else ""
+    return (
+        f"{prefix}repositories(first: {PAGE_SIZE}{args}) "
+        f"{{ {PAGE_INFO} nodes {{ ...RepoFields }} }}"
+    )
+
+
+def build_query(pages: List[Page], username: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Собирает один GraphQL-запрос из нескольких страниц с алиасами p0, p1, ...
+    Если передан username, в тот же запрос добавляется профиль.
+    """
+    declarations: List[str] = []
+    variables: Dict[str, Any] = {}
+    viewer: List[str] = []
+    top: List[str] = []
+
+    for i, page in enumerate(pages):
+        alias = f"p{i}"
+        after = ""
+        if page.cursor is not None:
+            declarations.append(f"$c{i}: String")
+            variables[f"c{i}"] = page.cursor
+            after = f", after: $c{i}"
+
+        if page.kind == "owned":
+            viewer.append(_repositories(f", affiliations: [OWNER]{after}", alias))
+        elif page.kind == "collab":
+            viewer.append(_repositories(f", affiliations: [COLLABORATOR]{after}", alias))
+        elif page.kind == "orgs":
+            viewer.append(
+                f"{alias}: organizations(first: {ORGS_PAGE_SIZE}{after}) {{ {PAGE_INFO} "
+                f"nodes {{ login name description avatarUrl {_repositories('')} }}"
+                " }"
+            )
+        elif page.kind == "org":
+            declarations.append(f"$l{i}: String!")
+            variables[f"l{i}"] = page.login
+            top.append(f"{alias}: organization(login: $l{i}) {{ {_repositories(after)} }}")
+        else:
+            raise ValueError(f"Неизвестный тип страницы: {page.kind}")
+
+    if username is not None:
+        declarations.append("$login: String!")
+        variables["login"] = username
+        top.append(PROFILE_SELECTION)
+    if viewer:
+        top.insert(0, "viewer { " + "\n".join(viewer) + " }")
+    top.append(RATE_LIMIT)
+
+    signature = f"({', '.join(declarations)})" if declarations else ""
+    query = f"query{signature} {{\n" + "\n".join(top) + "\n}\n" + REPO_FRAGMENT
+    return query, variables
 
 
 async def github_graphql_query(
-    session: aiohttp.ClientSession, token: str, query: str
+    token: str,
+    query: str,
+    variables: Optional[Dict[str, Any]] = None,
+    allow_partial: bool = False,
 ) -> Dict[str, Any]:
-    url = "https://api.github.com/graphql"
+    """
+    allow_partial=True возвращает ответ, даже если часть полей упала
+    (например, организация с SAML SSO), — такие поля будут null.
+    """
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = {"query": query}
-    async with session.post(url, headers=headers, json=payload) as response:
-        if response.status != 200:
-            text = await response.text()
-            raise Exception(f"HTTP {response.status}: {text}")
-        data: Dict[str, Any] = await response.json()
-        if "errors" in data:
-            error_msgs = "; ".join([err["message"] for err in data["errors"]])
-            raise Exception(f"GraphQL errors: {error_msgs}")
-        return data
-
-
-@alru_cache(ttl=240)
+    payload = {"query": query, "variables": variables or {}}
+    with timed("github"):
+        data = await GITHUB.request_json("POST", GITHUB_GRAPHQL_URL, headers=headers, json=payload)
+
+    rate = (data.get("data") or {}).get("rateLimit")
+    if rate:
+        GITHUB.record_cost(rate.get("cost"), rate.get("remaining"))
+
+    if "errors" in data and (not allow_partial or not data.get("data")):
+        error_msgs = "; ".join([err["message"] for err in data["errors"]])
+        raise UpstreamError(f"GraphQL errors: {error_msgs}")
+    return data
+
+
+class _Collected(NamedTuple):
+    user: Dict[str, Any]
+    orgs: List[Dict[str, Any]]
+    owned: List[Dict[str, Any]]
+    collab: List[Dict[str, Any]]
+    org_repos: Dict[str, List[Dict[str, Any]]]
+
+
+async def _collect(token: str, username: str) -> _Collected:
+    """Первый запрос забирает всё сразу, дальше — только недостающие страницы."""
+    orgs: List[Dict[str, Any]] = []
+    lists: Dict[str, List[Dict[str, Any]]] = {"owned": [], "collab": []}
+    org_repos: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    user: Optional[Dict[str, Any]] = None
+
+    pending = [Page("owned"), Page("collab"), Page("orgs")]
+    for round_no in range(MAX_ROUNDS):
+        if not pending:
+            break
+        query, variables = build_query(pending, username if round_no == 0 else None)
+        data = (await github_graphql_query(token, query, variables, allow_partial=True))["data"]
+        if round_no == 0:
+            user = data.get("user")
+            if user is None:
+                raise UpstreamError(f"GitHub: пользователь {username} не найден")
+
+        # null допустим только у организаций (например, с SAML SSO): без
+        # своих репозиториев или профиля карточка не должна кэшироваться
+        next_pages: List[Page] = []
+        for i, page in enumerate(pending):
+            alias = f"p{i}"
+            if page.kind == "org":
+                conn = (data.get(alias) or {}).get("repositories")
+            else:
+                viewer = data.get("viewer")
+                if viewer is None:
+                    raise UpstreamError("GitHub: viewer не получен")
+                conn = viewer.get(alias)
+                if conn is None and page.kind != "orgs":
+                    raise UpstreamError(f"GitHub: страница {page.kind} не получена")
+            if conn is None:
+                continue
+
+            if page.kind == "orgs":
+                for org in conn["nodes"]:
+                    orgs.append(org)
+                    repos = org.pop("repositories", None)
+                    if repos is None:
+                        continue
+                    org_repos[org["login"]].extend(repos["nodes"])
+                    if repos["pageInfo"]["hasNextPage"]:
+                        cursor = repos["pageInfo"]["endCursor"]
+                        next_pages.append(Page("org", cursor, org["login"]))
+            elif page.kind == "org":
+                assert page.login is not None
+                org_repos[page.login].extend(conn["nodes"])
+            else:
+                lists[page.kind].extend(conn["nodes"])
+
+            if conn["pageInfo"]["hasNextPage"]:
+                next_pages.append(page._replace(cursor=conn["pageInfo"]["endCursor"]))
+        pending = next_pages
+
+    if user is None:
+        raise UpstreamError(f"GitHub: пользователь {username} не найден")
+    return _Collected(user, orgs, lists["owned"], lists["collab"], org_repos)
+
+
+@swr_cache(
+    stale_ttl=CARDS_STALE_TTL,
+    expire_ttl=CARDS_EXPIRE_TTL,
+    backend=SHARED_CACHE,
+    lease=SHARED_CACHE_LEASE,
+)
 async def fetch_github_data(token: str, username: str) -> dict:
     """
     Единая асинхронная функция,
     которая собирает все требуемые данные о GitHub-профиле
     и возвращает их в виде словаря (готового к сериализации в JSON).
     """
-    async with aiohttp.ClientSession() as session:
-        # 1. Организации
-        orgs_task = asyncio.create_task(
-            github_graphql_query(
-                session,
-                token,
-                """
-        query {
-          viewer {
-            organizations(first: 100) {
-              nodes {
-                login
-                name
-                description
-                avatarUrl
-              }
-            }
-          }
-        }
-        """,
-            )
-        )
-
-        # 2. Личные репозитории (OWNER)
-        personal_task = asyncio.create_task(
-            github_graphql_query(
-                session,
-                token,
-                """
-        query {
-          viewer {
-            repositories(first: 100, affiliations: [OWNER]) {
-              edges {
-                node {
-                  name
-                  owner { login }
-                  description
-                  stargazerCount
-                  pullRequests(states: OPEN) { totalCount }
-                  issues(states: OPEN) { totalCount }
-                  isFork
-                  viewerPermission
-                  languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
-                    edges { size node { name } }
-                    totalSize
-                  }
-                }
-              }
-            }
-          }
-        }
-        """,
-            )
-        )
-
-        # 3. Репозитории с внешней коллаборацией
-        collab_task = asyncio.create_task(
-            github_graphql_query(
-                session,
-                token,
-                """
-        query {
-          viewer {
-            repositories(first: 100, affiliations: [COLLABORATOR]) {
-              edges {
-                node {
-                  name
-                  owner { login }
-                  description
-                  stargazerCount
-                  pullRequests(states: OPEN) { totalCount }
-                  issues(states: OPEN) { totalCount }
-                  isFork
-                  viewerPermission
-                  languages(first: 10, orderBy: {field: SIZE, direction: DESC}) {
-                    edges { size node { name } }
-                    totalSize
-                  }
-                }
-              }
-            }
-          }
-        }
-        """,
-            )
-        )
-
-        # 4. Профиль + полный contributionCalendar
-        profile_task = asyncio.create_task(
-            github_graphql_query(
-                session,
-                token,
-                f"""
-        query {{
-          user(login: "{username}") {{
-            login
-            avatarUrl
-            bio
-            createdAt
-            followers {{
-              totalCount
-            }}
-            contributionsCollection {{
-              contributionCalendar {{
-                totalContributions
-                weeks {{
-                  contributionDays {{
-                    contributionCount
-                    date
-                  }}
-                }}
-              }}
-            }}
-          }}
-        }}
-        """,
-            )
-        )
-
-        org_data, personal_data, collab_data, profile_data = await asyncio.gather(
-            orgs_task, personal_task, collab_task, profile_task
-        )
+    collected = await _collect(token, username)
 
     # Организации
-    org_nodes = org_data["data"]["viewer"]["organizations"]["nodes"]
     organizations = []
-    org_logins = [org["login"] for org in org_nodes]
-    for org in org_nodes:
+    for org in collected.orgs:
         organizations.append(
             {
                 "login": org["login"],
@@ -170,59 +239,21 @@ async def fetch_github_data(token: str, username: str) -> dict:
             }
         )
 
-    # Репозитории из организаций (параллельно)
-    async with aiohttp.ClientSession() as session:
-        org_repo_tasks = []
-        for org_login in org_logins:
-            query = f"""
-            query {{
-              organization(login: "{org_login}") {{
-                repositories(first: 100) {{
-                  edges {{
-                    node {{
-                      name
-                      owner {{ login }}
-                      description
-                      stargazerCount
-                      pullRequests(states: OPEN) {{ totalCount }}
-                      issues(states: OPEN) {{ totalCount }}
-                      isFork
-                      viewerPermission
-                      languages(first: 10, orderBy: {{field: SIZE, direction: DESC}}) {{
-                        edges {{ size node {{ name }} }}
-                        totalSize
-                      }}
-                    }}
-                  }}
-                }}
-              }}
-            }}
-            """
-            org_repo_tasks.append(github_graphql_query(session, token, query))
-
-        org_repos_results = await asyncio.gather(*org_repo_tasks, return_exceptions=True)
-
     # Сбор отфильтрованных репозиториев
     repositories = []
 
     # Личные
-    for repo in personal_data["data"]["viewer"]["repositories"]["edges"]:
-        node = repo["node"]
+    for node in collected.owned:
         repositories.append(_process_repo_node(node, default_permission="ADMIN"))
 
     # Внешние коллаборации
-    for repo in collab_data["data"]["viewer"]["repositories"]["edges"]:
-        node = repo["node"]
+    for node in collected.collab:
         if node["viewerPermission"] in ["ADMIN", "MAINTAIN", "WRITE"]:
             repositories.append(_process_repo_node(node))
 
     # Из организаций
-    for result in org_repos_results:
-        if isinstance(result, BaseException):
-            continue
-        edges = result["data"]["organization"]["repositories"]["edges"]
-        for repo in edges:
-            node = repo["node"]
+    for org in collected.orgs:
+        for node in collected.org_repos.get(org["login"], []):
             if node["viewerPermission"] in ["ADMIN", "MAINTAIN", "WRITE"] and not node[
                 "name"
             ].startswith("."):
@@ -230,7 +261,7 @@ async def fetch_github_data(token: str, username: str) -> dict:
     repositories = sorted(repositories, key=lambda x: x["stars"], reverse=True)
 
     # Профиль
-    user = profile_data["data"]["user"]
+    user = collected.user
     profile = {
         "login": user["login"],
         "avatar_url": user["avatarUrl"],
@@ -256,44 +287,18 @@ async def fetch_github_data(token: str, username: str) -> dict:
             }
         )
 
-    # Контрибьюции по месяцам
-    # Используем два отдельных словаря для сбора данных
-    monthly_totals: Dict[str, int] = defaultdict(int)
+    # Контрибьюции по месяцам: календарь хранится между обновлениями
+    # и получает только изменившиеся дни
     weeks = user["contributionsCollection"]["contributionCalendar"]["weeks"]
-
-    for week in weeks:
-        for day in week["contributionDays"]:
-            date_str = day["date"]
-            count = day["contributionCount"]
-            month_key = datetime.strptime(date_str, "%Y-%m-%d").strftime("%B %Y")
-            monthly_totals[month_key] += count
-
-    # Создаем финальный словарь с кортежами (total, percentage)
-    monthly_contributions: Dict[str, tuple[int, float]] = {}
-
-    if monthly_totals:
-        max_total = max(monthly_totals.values())
-        percent_step = 100 / max_total
-
-        for month_key, total in monthly_totals.items():
-            monthly_contributions[month_key] = (total, percent_step * total)
-
-    # Сортируем по дате
-    sorted_monthly = dict(
-        sorted(monthly_contributions.items(), key=lambda x: datetime.strptime(x[0], "%B %Y"))
-    )
-    keys_sm = list(sorted_monthly.keys())
+    calendar = _CALENDARS.setdefault(username, ContributionCalendar())
+    monthly_contributions = calendar.merge_weeks(weeks).monthly()
 
     # Итоговый результат
     return {
         "organizations": organizations,
         "repositories": repositories,
         "profile": profile,
-        "monthly_contributions": {
-            "monthly": sorted_monthly,
-            "first_month": keys_sm[0] if keys_sm else "",
-            "last_month": keys_sm[-1] if keys_sm else "",
-        },
+        "monthly_contributions": monthly_contributions,
     }
 
 
@@ -0,0 +1,45 @@
+"""
+Настройки gunicorn (файл из текущего каталога подхватывается сам):
+
+    gunicorn --workers 4 --threads 4
+
+С WARMUP=1 (по умолчанию) приложение создаётся и прогревается в мастере
+до fork'а (warmup.py). Память каждого воркера пишется в лог сразу после
+fork'а и при завершении: по Pss и Private_* видно, сколько он делит с мастером.
+"""
+
+from typing import Any
+
+from settings import PREFETCH_IN_PROCESS, WARMUP
+
+# фоновые потоки не переживают fork, так что prefetch запускается в post_fork
+wsgi_app = "main:create_app(prefetch=False)"
+preload_app = WARMUP
+
+
+def on_starting(server: Any) -> None:
+    if not WARMUP:
+        return
+    from warmup import format_memory, memory_usage, warmup
+
+    # с preload_app приложение уже создано
+    timings = warmup(server.app.wsgi())
+    server.log.info("warmup: %s", ", ".join(f"{step} {ms:.0f} ms" for step, ms in timings.items()))
+    server.log.info("master: %s", format_memory(memory_usage()))
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    from warmup import format_memory, memory_usage
+
+    server.log.info("worker %s started: %s", worker.pid, format_memory(memory_usage()))
+
+    if PREFETCH_IN_PROCESS:
+        from prefetch import Prefetcher, card_jobs
+
+        Prefetcher(card_jobs()).start()
+
+
+def worker_exit(server: Any, worker: Any) -> None:
+    from warmup import format_memory, memory_usage
+
+    server.log.info("worker %s exiting: %s", worker.pid, format_memory(memory_usage()))
@@ -0,0 +1,63 @@
+import asyncio
+import atexit
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+from settings import HTTP_DNS_TTL, HTTP_KEEPALIVE, HTTP_LIMIT, HTTP_LIMIT_PER_HOST, HTTP_TIMEOUT
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Одна сессия (и один пул keep-alive соединений) на event loop.
+# Запросы к upstream идут из фонового loop'а (background.py), так что
+# на практике сессия одна на процесс.
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _new_session() -> "aiohttp.ClientSession":
+    # aiohttp импортируется при первом запросе к upstream: это самый долгий
+    # импорт приложения, а страницы кроме /cards/* он не нужен
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE,
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    )
+
+
+def get_session() -> "aiohttp.ClientSession":
+    """Общая сессия текущего event loop'а. Вызывать только внутри корутины."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = _new_session()
+        _sessions[loop] = session
+    return session
+
+
+async def close_session() -> None:
+    """Закрывает сессию текущего loop'а (например, перед asyncio.run(...) выходом)."""
+    session: Optional["aiohttp.ClientSession"] = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _close_background_session() -> None:
+    from background import is_running, submit
+
+    if not is_running():
+        return
+    try:
+        submit(close_session()).result(timeout=5)
+    except Exception:
+        pass
+
+
+atexit.register(_close_background_session)
@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+
+from metrics import timed
+
+STATIC_ROOT = Path("static")
+MANIFEST_PATH = Path("build/image_index.json")
+IMAGE_EXTENSIONS = (".webp", ".png", ".jpg", ".jpeg", ".gif", ".ico", ".avif", ".bmp")
+
+
+class ImageInfo(NamedTuple):
+    width: int
+    height: int
+    mtime: float
+    size: int
+
+
+class ImageIndex:
+    """
+    Индекс размеров картинок: путь -> (width, height, mtime, size).
+    Заполняется при старте сканированием static/ или из готового манифеста,
+    при каждом обращении сверяет mtime и размер файла и перечитывает заголовок
+    картинки только если файл изменился.
+    """
+
+    def __init__(self, root: Path = STATIC_ROOT) -> None:
+        self.root = root
+        self._entries: Dict[str, ImageInfo] = {}
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return os.path.normpath(path)
+
+    @staticmethod
+    def _read(path: str, st: os.stat_result) -> Optional[ImageInfo]:
+        # Pillow нужен только для новых или изменённых файлов (обычно есть манифест)
+        from PIL import Image
+
+        try:
+            with Image.open(path) as im:
+                w, h = im.size
+        except Exception:
+            return None
+        return ImageInfo(w, h, st.st_mtime, st.st_size)
+
+    @timed("image_size")
+    def get(self, path: Union[str, Path]) -> Optional[ImageInfo]:
+        """Возвращает информацию о картинке или None, если это не картинка."""
+        key = self._key(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            self._entries.pop(key, None)
+            return None
+
+        info = self._entries.get(key)
+        if info is not None and info.mtime == st.st_mtime and info.size == st.st_size:
+            return info
+
+        info = self._read(key, st)
+        if info is None:
+            self._entries.pop(key, None)
+        else:
+            self._entries[key] = info
+        return info
+
+    def scan(self) -> int:
+        """Обходит root и индексирует все картинки. Возвращает их количество."""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    self.get(os.path.join(dirpath, name))
+        return len(self._entries)
+
+    def save_manifest(self, path: Path = MANIFEST_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {key: list(info) for key, info in sorted(self._entries.items())}
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    def load_manifest(self, path: Path = MANIFEST_PATH) -> bool:
+        """Загружает манифест, если он есть. Устаревшие записи отсеются по mtime."""
+        if not path.is_file():
+            return False
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for key, (w, h, mtime, size) in data.items():
+            self._entries[self._key(key)] = ImageInfo(int(w), int(h), float(mtime), int(size))
+        return True
+
+    def load(self) -> None:
+        """Загрузка при старте: манифест, если он собран, иначе сканирование static/."""
+        if not self.load_manifest():
+            self.scan()
+
+
+IMAGE_INDEX = ImageIndex()
+
+
+if __name__ == "__main__":
+    count = IMAGE_INDEX.scan()
+    IMAGE_INDEX.save_manifest()
+    print(f"{count} images -> {MANIFEST_PATH}", file=sys.stderr)
@@ -0,0 +1,151 @@
+import fcntl
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+from image_index import IMAGE_EXTENSIONS, IMAGE_INDEX
+from settings import IMAGE_VARIANT_AVIF, IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WIDTHS
+
+STATIC_ROOT = Path("static")
+VARIANTS_DIR = Path("build/variants")
+STATIC_URL = "/static/"
+VARIANTS_URL = "/variants/"
+# Из чего делаем варианты: gif/ico/svg оставляем как есть
+SOURCE_EXTENSIONS = (".webp", ".png", ".jpg", ".jpeg")
+FORMATS: Dict[str, str] = {"webp": "WEBP", "avif": "AVIF"}
+
+
+def variant_name(rel: str, width: int, fmt: str) -> str:
+    """papers/x/static/1.webp -> papers/x/static/1.webp.640w.webp"""
+    return f"{rel}.{width}w.{fmt}"
+
+
+def parse_variant(name: str) -> Optional[Tuple[str, int, str]]:
+    """Обратная к variant_name: (исходный путь, ширина, формат) или None."""
+    stem, _, fmt = name.rpartition(".")
+    rel, _, width = stem.rpartition(".")
+    if not rel or not width.endswith("w") or not width[:-1].isdigit():
+        return None
+    return rel, int(width[:-1]), fmt
+
+
+class ImageVariants:
+    """
+    Уменьшенные копии картинок из static/ для srcset. Варианты создаются
+    лениво при первом запросе (или заранее через python image_variants.py)
+    и лежат в build/variants; генерацию одного файла несколькими воркерами
+    разводит flock. Копия пересоздаётся, если исходник стал новее.
+    """
+
+    def __init__(
+        self,
+        static_root: Path = STATIC_ROOT,
+        out_dir: Path = VARIANTS_DIR,
+        widths: Tuple[int, ...] = IMAGE_VARIANT_WIDTHS,
+        avif: bool = IMAGE_VARIANT_AVIF,
+        quality: int = IMAGE_VARIANT_QUALITY,
+    ) -> None:
+        self.static_root = static_root
+        self.out_dir = out_dir
+        self.widths = tuple(sorted(widths))
+        self.formats = ("webp", "avif") if avif else ("webp",)
+        self.quality = quality
+
+    def relative(self, path: Union[str, Path]) -> Optional[str]:
+        """Путь картинки относительно static/ или None, если она не оттуда."""
+        rel = os.path.relpath(os.path.normpath(path), self.static_root)
+        if rel.startswith(os.pardir) or not rel.lower().endswith(SOURCE_EXTENSIONS):
+            return None
+        return Path(rel).as_posix()
+
+    def widths_for(self, rel: str) -> List[int]:
+        info = IMAGE_INDEX.get(self.static_root / rel)
+        if info is None:
+            return []
+        return [w for w in self.widths if w < info.width]
+
+    def srcset(self, rel: str, fmt: str = "webp") -> Optional[str]:
+        """
+        srcset из вариантов и оригинала (для webp) или None, если картинка
+        и так не больше самого узкого варианта.
+        """
+        info = IMAGE_INDEX.get(self.static_root / rel)
+        if info is None or fmt not in self.formats:
+            return None
+        widths = [w for w in self.widths if w < info.width]
+        if not widths:
+            return None
+        items = [f"{VARIANTS_URL}{quote(variant_name(rel, w, fmt))} {w}w" for w in widths]
+        if fmt == "webp":
+            items.append(f"{STATIC_URL}{quote(rel)} {info.width}w")
+        return ", ".join(items)
+
+    def path(self, name: str) -> Optional[Path]:
+        """
+        Путь к готовому варианту по его имени (из URL), при необходимости
+        создаёт его. None, если такого варианта быть не может.
+        """
+        parsed = parse_variant(name)
+        if parsed is None:
+            return None
+        rel, width, fmt = parsed
+        # сначала проверка пути: widths_for() читает картинку и кладёт её в индекс
+        if self.relative(self.static_root / rel) != rel:
+            return None
+        if fmt not in self.formats or width not in self.widths_for(rel):
+            return None
+
+        target = self.out_dir / name
+        if not self._fresh(self.static_root / rel, target):
+            self._generate(self.static_root / rel, target, width, fmt)
+        return target
+
+    @staticmethod
+    def _fresh(source: Path, target: Path) -> bool:
+        try:
+            return os.stat(target).st_mtime >= os.stat(source).st_mtime
+        except OSError:
+            return False
+
+    def _generate(self, source: Path, target: Path, width: int, fmt: str) -> None:
+        from PIL import Image
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target.with_name(target.name + ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # пока ждали блокировку, вариант мог сделать другой воркер
+            if self._fresh(source, target):
+                return
+            with Image.open(source) as im:
+                height = max(1, round(im.height * width / im.width))
+                resized = im.resize((width, height), Image.Resampling.LANCZOS)
+            tmp = target.with_name(target.name + ".tmp")
+            resized.save(tmp, FORMATS[fmt], quality=self.quality)
+            os.replace(tmp, target)
+
+    def generate_all(self) -> int:
+        """Создаёт все варианты для всех картинок static/. Возвращает их количество."""
+        count = 0
+        for dirpath, _, filenames in os.walk(self.static_root):
+            for filename in filenames:
+                if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                rel = self.relative(os.path.join(dirpath, filename))
+                if rel is None:
+                    continue
+                for width in self.widths_for(rel):
+                    for fmt in self.formats:
+                        if self.path(variant_name(rel, width, fmt)) is not None:
+                            count += 1
+        return count
+
+
+IMAGE_VARIANTS = ImageVariants()
+
+
+if __name__ == "__main__":
+    IMAGE_INDEX.load()
+    count = IMAGE_VARIANTS.generate_all()
+    print(f"{count} variants -> {VARIANTS_DIR}", file=sys.stderr)
@@ -1,71 +1,84 @@
-import json
+import hmac
 import os
-from datetime import datetime, date
-from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union
-
-from flask import Flask, Response, abort, render_template, request, send_from_directory
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    current_app,
+    render_template,
+    request,
+    send_file,
+    send_from_directory,
+)
 from flask_minify import Minify
-from PIL import Image
-
-from github import fetch_github_data
-from pswp import render_pswp_description, wrap_images
-from steam import get_user_data
-from tools import render_md, plural_ru
-
-app = Flask(__name__)
-
-# Или с дополнительными настройками:
-Minify(
-    app=app,
-    html=True,        # минификация HTML
-    js=True,          # минификация inline JS
-    cssless=True,     # минификация inline CSS
-    caching_limit=200,
-    static=True,      # минификация статических файлов (ограниченно)
-    bypass=[],        # список endpoint’ов, которые не минифицировать
+from jinja2 import FileSystemBytecodeCache
+
+import background
+from assets import ASSETS, ASSETS_DIR, bundle_urls
+from assets import url_for as asset_url_for
+from cache import ByteLRUCache
+from conditional import not_modified, strong_etag, templates_hash, with_etag
+from config_store import ConfigStore
+from content_encoding import COMPRESSED_DIR, ResponseCompressor, send_precompressed
+from fragment_cache import FragmentCacheExtension
+from github import GITHUB, fetch_github_data
+from image_index import IMAGE_INDEX
+from image_variants import IMAGE_VARIANTS
+from metrics import METRICS, Sample, init_app, timed
+from papers import PAPER_CACHE
+from prefetch import Prefetcher, card_jobs
+from settings import (
+    FRAGMENT_CACHE_BYTES,
+    JINJA_BYTECODE_DIR,
+    MINIFY_MODE,
+    PREFETCH_IN_PROCESS,
+    load_secrets,
 )
+from steam import STEAM, get_user_data
+from template_minify import MinifyTemplatesExtension
+from timeline import TIMELINE
 
+# Сжатые страницы и отрендеренные фрагменты общие для всех приложений процесса
+COMPRESSOR = ResponseCompressor(endpoints=("papers", "experience", "steam", "github"))
+FRAGMENT_CACHE: ByteLRUCache[str] = ByteLRUCache(FRAGMENT_CACHE_BYTES)
 
-with open("configs/secrets.json", encoding="utf-8") as f:
-    SECRETS: Dict[str, Any] = json.load(f)
-
+CONFIG_STORE = ConfigStore()
 
-@app.context_processor
-def inject_config() -> Dict[str, Any]:
-    with open("configs/info_panel.json", encoding="utf-8") as f:
-        info_bar: Dict[str, Any] = json.load(f)
-    with open("configs/navigation.json", encoding="utf-8") as f:
-        navigation: Dict[str, Any] = json.load(f)
-
-    def get_size(path: str, static_root: Path = Path("static")) -> List[int]:
-        path = os.path.join(static_root, path)
-        if not os.path.isfile(path):
-            return [200, 200]
 
-        with Image.open(path) as im:
-            w, h = im.size
+class TimedMinify(Minify):
+    """Flask-Minify, время постобработки которого попадает в фазу minify."""
 
-        min_size = 200
-        if w < min_size or h < min_size:
-            scale = max(min_size / w, min_size / h)
-            w = int(round(w * scale))
-            h = int(round(h * scale))
+    def main(self, response: Response) -> Response:
+        with timed("minify"):
+            result: Response = super().main(response)
+        return result
 
-        return [w, h]
 
+def site_version() -> Tuple[Any, ...]:
+    """
+    То, что попадает в каждую страницу: шаблоны (и режим их минификации),
+    конфиги с датой, манифест ассетов.
+    """
+    assert current_app.template_folder is not None
+    templates = templates_hash(
+        os.path.join(current_app.root_path, current_app.template_folder),
+        current_app.jinja_env.auto_reload,
+    )
+    return templates, MINIFY_MODE, CONFIG_STORE.version(), ASSETS.version, request.script_root
 
-    birth = datetime.strptime(info_bar["age"], "%Y-%m-%d").date()
-    today = date.today()
-    age = today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
 
-    info_bar["age"] = plural_ru(age, "год", "года", "лет")
+@timed("context")
+def inject_config() -> Dict[str, Any]:
+    # site_version - ключ кэша фрагментов info_panel и navigation в base.html
+    return dict(CONFIG_STORE.context(), site_version=site_version())
 
-    info_bar["avatar"]["size"] = get_size(info_bar["avatar"]["url"])
-    for i in info_bar["avatar"]["extra"]:
-        i["size"] = get_size(i["url"])
 
-    return {"info_panel": info_bar, "navigation": navigation}
+def page_etag(*parts: Any) -> str:
+    """ETag страницы: входы маршрута плюс site_version()."""
+    return strong_etag(*site_version(), *parts)
 
 
 # ------------------------
@@ -73,71 +86,90 @@ def inject_config() -> Dict[str, Any]:
 # ------------------------
 
 
-@app.route("/cards/steam")
-async def steam() -> str:
-    steam_data = await get_user_data()
+# Вьюхи синхронные и выполняются в потоке запроса. В общий фоновый loop
+# (background.py) уходит только получение данных карточек: там ждут upstream
+# все параллельные запросы процесса, и рендер шаблонов его не занимает.
+
+
+def steam() -> Response:
+    with timed("card_data"):
+        steam_data = background.run(get_user_data())
 
-    return render_template(
-        "cards/steam.html",
-        steam_user=steam_data["user"],
-        steam_badges=steam_data["badges"],
-        steam_games=steam_data["games"],
+    etag = page_etag("steam", get_user_data.fetched_at())
+    cached = not_modified(etag, COMPRESSOR)
+    if cached is not None:
+        return cached
+
+    return with_etag(
+        render_template(
+            "cards/steam.html",
+            steam_user=steam_data["user"],
+            steam_badges=steam_data["badges"],
+            steam_games=steam_data["games"],
+        ),
+        etag,
     )
 
 
-@app.route("/cards/github")
-async def github() -> str:
-    result = await fetch_github_data(SECRETS["github"], SECRETS["github_id"])
+def github() -> Response:
+    secrets = load_secrets()
+    with timed("card_data"):
+        result = background.run(fetch_github_data(secrets["github"], secrets["github_id"]))
+
+    fetched_at = fetch_github_data.fetched_at(secrets["github"], secrets["github_id"])
+    etag = page_etag("github", fetched_at)
+    cached = not_modified(etag, COMPRESSOR)
+    if cached is not None:
+        return cached
 
-    return render_template(
-        "cards/github.html",
-        contributions=result["monthly_contributions"],
-        organizations=result["organizations"],
-        profile=result["profile"],
-        repositories=result["repositories"],
+    return with_etag(
+        render_template(
+            "cards/github.html",
+            contributions=result["monthly_contributions"],
+            organizations=result["organizations"],
+            profile=result["profile"],
+            repositories=result["repositories"],
+        ),
+        etag,
     )
 
 
-@app.route("/")
-async def home() -> str:
-    return render_template("index.html")
+def home() -> Response:
+    etag = page_etag("home")
+    cached = not_modified(etag, COMPRESSOR)
+    if cached is not None:
+        return cached
+
+    return with_etag(render_template("index.html"), etag)
 
 
-@app.route("/get/cv")
-async def get_cv() -> str:
+def get_cv() -> str:
     return render_template("get_cv.html")
 
 
-@app.route("/get/cv/ok")
-async def get_cv_ok() -> Union[str, Tuple[Response, int]]:
+def get_cv_ok() -> Union[str, Tuple[Response, int]]:
     password = request.args.get("psw")
 
-    if str(password) == str(SECRETS["password_cv"]):
+    if str(password) == str(load_secrets()["password_cv"]):
         return render_template("cv.txt")
     else:
         abort(403, description="Неверный пароль")
 
 
-@app.route("/experience")
-async def experience() -> str:
-    with open("configs/timeline.json", encoding="utf-8") as f:
-        exp: List[Dict[str, Any]] = json.load(f)
+def experience() -> Response:
+    etag = page_etag("experience", TIMELINE.mtime)
+    cached = not_modified(etag, COMPRESSOR)
+    if cached is not None:
+        return cached
 
-    today = datetime.today().strftime("%d.%m.%Y")
-
-    for e in exp:
-        if isinstance(e.get("description"), list):
-            e["description"] = render_md(render_pswp_description(e["description"]))
-
-        if "point" not in e["timeline"] and e["timeline"]["to"].upper() == "NOW":
-            e["timeline"]["to"] = today
-            e["timeline"]["now"] = True
+    return with_etag(
+        render_template("experience.html", experience=TIMELINE.get(), experience_per_day="0.65"),
+        etag,
+    )
 
-    return render_template("experience.html", experience=exp, experience_per_day="0.65")
 
-@app.route("/papers/<path:slug>")
-async def papers(slug: str) -> str:
-    base_dir = os.path.join(app.root_path, "static", "papers")
+def papers(slug: str) -> Response:
+    base_dir = os.path.join(current_app.root_path, "static", "papers")
     md_path = os.path.join(base_dir, slug, "paper.md")
 
     if not os.path.abspath(md_path).startswith(os.path.abspath(base_dir)):
@@ -146,25 +178,82 @@ async def papers(slug: str) -> str:
     if not os.path.isfile(md_path):
         abort(404, description="Статья не найдена")
 
-    with open(md_path, encoding="utf-8") as f:
-        md = f.read()
+    paper = PAPER_CACHE.get(md_path, slug)
 
-    html = wrap_images(render_md(md))
+    etag = page_etag("paper", slug, paper.content_hash)
+    cached = not_modified(etag, COMPRESSOR)
+    if cached is not None:
+        return cached
+
+    return with_etag(
+        render_template("paper.html", pape=paper.html, page_type="paper", paper_slug=slug),
+        etag,
+    )
 
-    return render_template("paper.html", pape=html, page_type="paper", paper_slug=slug)
+
+def assets(filename: str) -> Response:
+    # имя содержит хэш содержимого, так что файл можно кэшировать навсегда
+    response = send_precompressed(ASSETS_DIR, filename, ASSETS_DIR, max_age=31536000)
+    response.cache_control.immutable = True
+    return response
+
+
+def variants(filename: str) -> Response:
+    # уменьшенная копия создаётся при первом запросе
+    path = IMAGE_VARIANTS.path(filename)
+    if path is None:
+        abort(404)
+    return send_file(path.resolve())
+
+
+def static(filename: str) -> Response:
+    assert current_app.static_folder is not None
+    return send_precompressed(current_app.static_folder, filename, COMPRESSED_DIR / "static")
+
+
+def metrics() -> Response:
+    # без секрета "metrics" в secrets.json эндпоинт выключен
+    token = load_secrets().get("metrics")
+    if not token:
+        abort(404)
+    auth = request.headers.get("Authorization", "")
+    supplied = auth.removeprefix("Bearer ") if auth else request.args.get("token", "")
+    if not hmac.compare_digest(supplied.encode("utf-8"), str(token).encode("utf-8")):
+        abort(403)
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+
+@METRICS.collector
+def cache_metrics() -> Iterator[Sample]:
+    caches = {
+        "steam": get_user_data.stats(),
+        "github": fetch_github_data.stats(),
+        "papers": PAPER_CACHE.stats(),
+        "fragments": FRAGMENT_CACHE.stats(),
+        "compressed_pages": COMPRESSOR.cache.stats(),
+    }
+    for cache, stats in caches.items():
+        for key, value in stats.items():
+            yield f"app_cache_{key}", {"cache": cache}, float(value)
+
+    for client in (STEAM, GITHUB):
+        stats = client.stats()
+        for key in ("requests", "retried", "consecutive_failures", "total_cost"):
+            if stats.get(key) is not None:
+                yield f"app_upstream_{key}", {"upstream": client.name}, float(stats[key])
+        yield "app_upstream_circuit_open", {"upstream": client.name}, float(stats["circuit_open"])
 
 
-@app.route("/robots.txt")
 def robots():
-    return send_from_directory(app.static_folder, "robots.txt")
+    return send_from_directory(current_app.static_folder, "robots.txt")
+
 
 # ------------------------
 # Errors
 # ------------------------
 
 
-@app.errorhandler(404)
-async def error_404(e: Any) -> Tuple[str, int]:
+def error_404(e: Any) -> Tuple[str, int]:
     return (
         render_template(
             "error.html",
@@ -177,8 +266,7 @@ async def error_404(e: Any) -> Tuple[str, int]:
     )
 
 
-@app.errorhandler(403)
-async def error_403(e: Any) -> Tuple[str, int]:
+def error_403(e: Any) -> Tuple[str, int]:
     return (
         render_template(
             "error.html",
@@ -190,8 +278,7 @@ async def error_403(e: Any) -> Tuple[str, int]:
     )
 
 
-@app.errorhandler(500)
-async def error_500(e: Any) -> Tuple[str, int]:
+def error_500(e: Any) -> Tuple[str, int]:
     return (
         render_template(
             "error.html",
@@ -203,5 +290,106 @@ async def error_500(e: Any) -> Tuple[str, int]:
     )
 
 
+# ------------------------
+# App
+# ------------------------
+
+ROUTES: Tuple[Tuple[str, Callable[..., Any]], ...] = (
+    ("/cards/steam", steam),
+    ("/cards/github", github),
+    ("/", home),
+    ("/get/cv", get_cv),
+    ("/get/cv/ok", get_cv_ok),
+    ("/experience", experience),
+    ("/papers/<path:slug>", papers),
+    ("/assets/<path:filename>", assets),
+    ("/variants/<path:filename>", variants),
+    ("/metrics", metrics),
+    ("/robots.txt", robots),
+)
+ERROR_HANDLERS: Tuple[Tuple[int, Callable[..., Any]], ...] = (
+    (404, error_404),
+    (403, error_403),
+    (500, error_500),
+)
+
+
+def create_app(prefetch: bool = PREFETCH_IN_PROCESS) -> Flask:
+    """
+    Собирает приложение: gunicorn "main:create_app()", flask --app main run.
+    Секреты и конфиги читаются здесь один раз; markdown, Pillow, bs4 и aiohttp
+    импортируются при первом запросе, которому они нужны.
+
+    prefetch - запустить фоновое обновление карточек в этом процессе.
+    gunicorn.conf.py передаёт False и запускает его в каждом воркере после fork'а.
+    """
+    app = Flask(__name__)
+
+    init_app(app)
+
+    # Сжатие регистрируется раньше Minify: after_request-хуки вызываются в обратном
+    # порядке, так что страница сначала минифицируется, а потом сжимается
+    app.after_request(COMPRESSOR)
+
+    if MINIFY_MODE == "response":
+        # Или с дополнительными настройками:
+        TimedMinify(
+            app=app,
+            html=True,  # минификация HTML
+            js=True,  # минификация inline JS
+            cssless=True,  # минификация inline CSS
+            caching_limit=200,
+            static=False,  # статика минифицируется при сборке (build_assets.py)
+            bypass=[],  # список endpoint’ов, которые не минифицировать
+        )
+    elif MINIFY_MODE == "templates":
+        app.jinja_env.add_extension(MinifyTemplatesExtension)
+
+    load_secrets()
+
+    IMAGE_INDEX.load()
+    CONFIG_STORE.load()
+
+    if prefetch:
+        Prefetcher(card_jobs()).start()
+
+    app.jinja_env.globals.update(url_for=asset_url_for, bundle_urls=bundle_urls)
+    app.jinja_env.extend(fragment_cache=FRAGMENT_CACHE)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if JINJA_BYTECODE_DIR:
+        # воркеры не компилируют шаблоны заново после перезапуска. Байткод
+        # зависит от режима минификации, а ключ кэша - только от исходника
+        bytecode_dir = os.path.join(JINJA_BYTECODE_DIR, MINIFY_MODE)
+        os.makedirs(bytecode_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+
+    app.context_processor(inject_config)
+    for rule, view in ROUTES:
+        app.add_url_rule(rule, view_func=view)
+    app.view_functions["static"] = static
+    for code, handler in ERROR_HANDLERS:
+        app.register_error_handler(code, handler)
+
+    return app
+
+
+_app: Optional[Flask] = None
+_app_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Flask:
+    """
+    main.app для старых точек входа (gunicorn main:app, flask --app main:app):
+    приложение создаётся при первом обращении, а не при импорте модуля.
+    """
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if _app is None:
+            _app = create_app()
+        return _app
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,164 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import (
+    Flask,
+    Response,
+    before_render_template,
+    g,
+    has_app_context,
+    request,
+    template_rendered,
+)
+
+# Границы корзин гистограмм, секунды
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (имя метрики, метки, значение) от функций, опрашиваемых при чтении /metrics
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Метрики процесса в текстовом формате Prometheus: гистограммы времени
+    и значения от зарегистрированных коллекторов (счётчики кэшей и т.п.).
+    Каждый воркер gunicorn отдаёт только свои данные.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._collectors: List[Callable[[], Iterator[Sample]]] = []
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def reset(self) -> None:
+        """Сбрасывает гистограммы (например, после прогрева в мастере gunicorn)."""
+        with self._lock:
+            self._histograms.clear()
+
+    def collector(self, fn: Callable[[], Iterator[Sample]]) -> Callable[[], Iterator[Sample]]:
+        """Декоратор: fn вызывается при каждом чтении /metrics."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, h.counts):
+                        cumulative += count
+                        le = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{_labels(labels, le)} {cumulative}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_labels(labels, le)} {h.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {h.sum:.6f}")
+                    lines.append(f"{name}_count{_labels(labels)} {h.count}")
+
+        for fn in self._collectors:
+            for name, sample_labels, value in fn():
+                lines.append(f"{name}{_labels(tuple(sorted(sample_labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def _record(phase: str, elapsed: float) -> None:
+    METRICS.observe("app_phase_seconds", elapsed, phase=phase)
+    if has_app_context():
+        timings: Optional[Dict[str, float]] = g.get("timings")
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + elapsed
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Засекает фазу обработки: пишет её в гистограмму app_phase_seconds и,
+    если идёт запрос, добавляет к его Server-Timing.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(phase, time.perf_counter() - start)
+
+
+def start_request() -> None:
+    g.timings = {}
+    g.request_started = time.perf_counter()
+
+
+def finish_request(response: Response) -> Response:
+    """Пишет время запроса в app_request_seconds и фазы в Server-Timing."""
+    started: Optional[float] = g.get("request_started")
+    timings: Optional[Dict[str, float]] = g.get("timings")
+    if started is None or timings is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    METRICS.observe(
+        "app_request_seconds",
+        elapsed,
+        endpoint=request.endpoint or "none",
+        status=str(response.status_code),
+    )
+    parts = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()]
+    parts.append(f"total;dur={elapsed * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(parts)
+    return response
+
+
+def _template_started(sender: Flask, **extra: object) -> None:
+    g.template_started = time.perf_counter()
+
+
+def _template_rendered(sender: Flask, **extra: object) -> None:
+    started: Optional[float] = g.pop("template_started", None)
+    if started is not None:
+        _record("template", time.perf_counter() - started)
+
+
+def init_app(app: Flask) -> None:
+    """
+    Подключает замеры к приложению. Вызывать до регистрации остальных
+    after_request-хуков: finish_request должен выполниться последним.
+    """
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_rendered, app)
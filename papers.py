@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from cache import ByteLRUCache, sizeof
+from image_index import IMAGE_INDEX
+from image_variants import IMAGE_VARIANTS
+from tools import render_md
+
+PAPERS_DIR = Path("static/papers")
+COMPILED_DIR = Path("build/papers")
+MANIFEST_NAME = "manifest.json"
+
+IMG_SRC_RE = re.compile(r"<img\b[^>]*?\ssrc=\"([^\"]*)\"")
+
+
+class RenderedPaper(NamedTuple):
+    html: str
+    # sha256 итогового HTML, годится как ETag
+    content_hash: str
+    # (путь, mtime) файлов, от которых зависит результат: paper.md и картинки
+    deps: Tuple[Tuple[str, float], ...]
+
+
+def content_hash(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return -1.0
+
+
+def image_paths(html: str, static_root: str = "") -> Tuple[str, ...]:
+    """Локальные картинки, на которые ссылается отрендеренный HTML."""
+    paths = []
+    for src in IMG_SRC_RE.findall(html):
+        if urlparse(src).scheme in ("http", "https"):
+            continue
+        paths.append(os.path.normpath(os.path.join(static_root, src.lstrip("/"))))
+    return tuple(dict.fromkeys(paths))
+
+
+def variant_settings() -> Dict[str, List[Any]]:
+    """Ширины и форматы вариантов картинок: от них зависят srcset в HTML статьи."""
+    return {"widths": list(IMAGE_VARIANTS.widths), "formats": list(IMAGE_VARIANTS.formats)}
+
+
+class CompiledPapers:
+    """
+    Доступ к статьям, заранее собранным compile_papers.py.
+    Фрагмент используется, только если хэш paper.md, размеры картинок и
+    настройки вариантов картинок совпадают с записанными в манифесте.
+    """
+
+    def __init__(self, directory: Path = COMPILED_DIR) -> None:
+        self.directory = directory
+        self._manifest_mtime: Optional[float] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def _refresh(self) -> None:
+        manifest = self.directory / MANIFEST_NAME
+        mtime = _mtime(str(manifest))
+        if mtime == self._manifest_mtime:
+            return
+        entries: Dict[str, Dict[str, Any]] = {}
+        if mtime >= 0:
+            with open(manifest, encoding="utf-8") as f:
+                entries = {e["slug"]: e for e in json.load(f)["papers"]}
+        self._entries = entries
+        self._manifest_mtime = mtime
+
+    def load(self, slug: str, md_path: str) -> Optional[RenderedPaper]:
+        self._refresh()
+        entry = self._entries.get(slug)
+        if entry is None or entry.get("variants") != variant_settings():
+            return None
+
+        md_mtime = _mtime(md_path)
+        with open(md_path, "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != entry["source_hash"]:
+                return None
+
+        for image in entry["images"]:
+            info = IMAGE_INDEX.get(image["path"])
+            if info is None or (info.width, info.height) != (image["width"], image["height"]):
+                return None
+
+        fragment = self.directory / entry["fragment"]
+        if not fragment.is_file():
+            return None
+        html = fragment.read_text(encoding="utf-8")
+
+        deps = ((md_path, md_mtime),) + tuple(
+            (image["path"], _mtime(image["path"])) for image in entry["images"]
+        )
+        return RenderedPaper(html, entry["content_hash"], deps)
+
+
+COMPILED_PAPERS = CompiledPapers()
+
+
+def render_paper(md_path: str, slug: Optional[str] = None) -> RenderedPaper:
+    """Собранный фрагмент, если он актуален, иначе рендер markdown на лету."""
+    if slug is not None:
+        compiled = COMPILED_PAPERS.load(slug, md_path)
+        if compiled is not None:
+            return compiled
+
+    md_mtime = _mtime(md_path)
+    with open(md_path, encoding="utf-8") as f:
+        md = f.read()
+
+    html = render_md(md, gallery=True)
+
+    deps = ((md_path, md_mtime),) + tuple((p, _mtime(p)) for p in image_paths(html))
+    return RenderedPaper(html, content_hash(html), deps)
+
+
+def _is_fresh(paper: RenderedPaper) -> bool:
+    return all(_mtime(path) == mtime for path, mtime in paper.deps)
+
+
+class PaperCache:
+    """
+    LRU-кэш готового HTML статей. Запись валидна, пока не изменился mtime
+    paper.md и картинок, на которые он ссылается.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self._cache: ByteLRUCache[RenderedPaper] = ByteLRUCache(
+            max_bytes, size_of=lambda p: sizeof(p.html)
+        )
+
+    def get(self, md_path: str, slug: Optional[str] = None) -> RenderedPaper:
+        key = os.path.normpath(md_path)
+        paper = self._cache.get(key, validate=_is_fresh)
+        if paper is None:
+            paper = render_paper(md_path, slug)
+            self._cache.set(key, paper)
+        return paper
+
+    def render(self, md_path: str, slug: Optional[str] = None) -> str:
+        return self.get(md_path, slug).html
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+PAPER_CACHE = PaperCache()
+
+
+def list_papers(papers_dir: Path = PAPERS_DIR) -> List[Tuple[str, Path]]:
+    """(slug, путь к paper.md) для всех статей."""
+    return sorted((md.parent.name, md) for md in papers_dir.glob("*/paper.md"))
@@ -0,0 +1,91 @@
+"""
+Фоновое обновление данных карточек, чтобы запросы к /cards/* не ходили в сеть.
+
+Внутри приложения включается через PREFETCH_IN_PROCESS=1, отдельным
+процессом запускается как `python -m prefetch` (пишет в общий кэш).
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import random
+import sys
+from typing import Any, List, NamedTuple, Tuple
+
+from cache import SWRCache
+from github import fetch_github_data
+from settings import PREFETCH_INTERVAL, load_secrets
+from shared_cache import SHARED_CACHE
+from steam import get_user_data
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchJob(NamedTuple):
+    name: str
+    cache: SWRCache[Any]
+    args: Tuple[Any, ...] = ()
+
+
+def card_jobs() -> List[PrefetchJob]:
+    secrets = load_secrets()
+    return [
+        PrefetchJob("steam", get_user_data),
+        PrefetchJob("github", fetch_github_data, (secrets["github"], secrets["github_id"])),
+    ]
+
+
+class Prefetcher:
+    """
+    Раз в interval (± jitter) обновляет каждое задание через SWRCache.prefetch.
+    При ошибке повторяет с экспоненциальной задержкой, а в кэше остаётся
+    предыдущий снимок.
+    """
+
+    def __init__(
+        self,
+        jobs: List[PrefetchJob],
+        interval: float = PREFETCH_INTERVAL,
+        jitter: float = 0.1,
+        retry_delay: float = 5.0,
+        max_backoff: float = 1800.0,
+    ) -> None:
+        self.jobs = jobs
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run_job(self, job: PrefetchJob) -> None:
+        # разносим старт заданий, чтобы воркеры не просыпались одновременно
+        await asyncio.sleep(random.uniform(0, self.interval * self.jitter))
+        failures = 0
+        while True:
+            try:
+                await asyncio.wrap_future(job.cache.prefetch(self.interval / 2, *job.args))
+                failures = 0
+                delay = self.interval
+            except Exception as e:
+                failures += 1
+                delay = min(self.retry_delay * 2**failures, self.max_backoff)
+                logger.warning("prefetch %s: ошибка #%d: %r", job.name, failures, e)
+            await asyncio.sleep(self._jittered(delay))
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._run_job(job) for job in self.jobs))
+
+    def start(self) -> "concurrent.futures.Future[None]":
+        """Запускает обновление в фоновом loop'е текущего процесса."""
+        from background import submit
+
+        return submit(self.run())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if SHARED_CACHE is None:
+        sys.exit("Отдельному воркеру нужен общий кэш: задайте SHARED_CACHE_DIR")
+    asyncio.run(Prefetcher(card_jobs()).run())
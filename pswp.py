@@ -1,17 +1,55 @@
+import html
 import os
+import re
+import xml.etree.ElementTree as etree
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
 from flask import url_for
+from markdown import Markdown
+from markdown.extensions import Extension
+from markdown.postprocessors import Postprocessor
+from markdown.treeprocessors import Treeprocessor
 from markupsafe import Markup, escape
-from PIL import Image
+
+from image_index import IMAGE_INDEX
+from image_variants import IMAGE_VARIANTS
+from metrics import timed
 
 STATIC_ROOT = Path("static/timeline/res")
+# Пустые теги, которые markdown пишет как <br />, и <source> из _responsive
+VOID_TAG_RE = re.compile(r"(<(?:br|hr|img|source)\b[^>]*?) />")
+# Теги и содержимое <script>/<style>: ссылки на символы в них не трогаются
+MARKUP_RE = re.compile(r"(<(?:script|style)\b.*?</(?:script|style)\s*>|<[^>]*>)", re.S | re.I)
+ENTITY_RE = re.compile(r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);")
+# Значение атрибута в двойных кавычках (так их пишет markdown)
+ATTR_RE = re.compile(r'(\s[^\s=/>]+=)"([^"]*)"')
+# Внутри них BeautifulSoup сохраняет пробельные строки как есть
+PRESERVE_RE = re.compile(r"<(/?)(?:pre|textarea)\b", re.I)
+# html.parser + formatter="minimal" в BeautifulSoup экранирует в тексте только их
+MINIMAL_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+# Ширина картинки в статье: колонка #paper в paper.css
+PAPER_IMAGE_SIZES = "(max-width: 650px) 100vw, 650px"
+
+
+def _responsive(file_path: str, sizes: str) -> Tuple[Dict[str, str], Optional[Dict[str, str]]]:
+    """Атрибуты srcset/sizes для <img> и <source> с AVIF, если он включён."""
+    rel = IMAGE_VARIANTS.relative(file_path)
+    srcset = IMAGE_VARIANTS.srcset(rel) if rel is not None else None
+    if rel is None or srcset is None:
+        return {}, None
+    avif = IMAGE_VARIANTS.srcset(rel, "avif")
+    source = {"type": "image/avif", "srcset": avif, "sizes": sizes} if avif else None
+    return {"srcset": srcset, "sizes": sizes}, source
+
 
+@timed("wrap_images")
+def wrap_images(html: str, static_root: str = "", sizes: str = PAPER_IMAGE_SIZES) -> str:
+    # Тяжёлый импорт: статьи рендерятся через PswpGalleryExtension,
+    # а эта функция осталась для совместимости и бенчмарков
+    from bs4 import BeautifulSoup
 
-def wrap_images(html: str, static_root: str = "") -> str:
     soup = BeautifulSoup(html, "html.parser")
 
     for p in soup.find_all("p"):
@@ -31,14 +69,19 @@ def wrap_images(html: str, static_root: str = "") -> str:
                 continue
 
             file_path = os.path.join(static_root, src_str.lstrip("/"))
-            if not os.path.isfile(file_path):
+            info = IMAGE_INDEX.get(file_path)
+            if info is None:
                 continue
+            w, h = info.width, info.height
 
-            try:
-                with Image.open(file_path) as im:
-                    w, h = im.size
-            except Exception:
-                continue
+            # Превью грузится из уменьшенных копий, в лайтбоксе остаётся оригинал
+            img_attrs, source_attrs = _responsive(file_path, sizes)
+            for name, value in img_attrs.items():
+                img[name] = value
+            thumb = img
+            if source_attrs is not None:
+                thumb = img.wrap(soup.new_tag("picture"))
+                thumb.insert(0, soup.new_tag("source", attrs=source_attrs))
 
             # Явно указываем типы атрибутов
             a = soup.new_tag(
@@ -50,7 +93,7 @@ def wrap_images(html: str, static_root: str = "") -> str:
                 },
             )
 
-            img.wrap(a)
+            thumb.wrap(a)
 
         # Правильная обработка классов
         current_classes = p.get("class")
@@ -69,6 +112,127 @@ def wrap_images(html: str, static_root: str = "") -> str:
     return str(soup)
 
 
+def _image_path(src: Optional[str], static_root: str) -> Optional[str]:
+    if not src or urlparse(src).scheme in ("http", "https"):
+        return None
+    return os.path.join(static_root, src.lstrip("/"))
+
+
+class PswpGalleryTreeprocessor(Treeprocessor):
+    """То же, что wrap_images, но прямо в ElementTree markdown'а."""
+
+    def __init__(self, md: Markdown, static_root: str, sizes: str) -> None:
+        super().__init__(md)
+        self.static_root = static_root
+        self.sizes = sizes
+
+    def run(self, root: etree.Element) -> None:
+        for p in root.iter("p"):
+            imgs = [child for child in p if child.tag == "img"]
+            if not imgs:
+                continue
+
+            for img in imgs:
+                src = img.get("src")
+                file_path = _image_path(src, self.static_root)
+                info = IMAGE_INDEX.get(file_path) if file_path is not None else None
+                if src is None or file_path is None or info is None:
+                    continue
+
+                img_attrs, source_attrs = _responsive(file_path, self.sizes)
+                for name, value in img_attrs.items():
+                    img.set(name, value)
+
+                a = etree.Element(
+                    "a",
+                    {
+                        "href": src,
+                        "data-pswp-width": str(info.width),
+                        "data-pswp-height": str(info.height),
+                    },
+                )
+                p.insert(list(p).index(img), a)
+                p.remove(img)
+                thumb = img
+                if source_attrs is not None:
+                    thumb = etree.Element("picture")
+                    etree.SubElement(thumb, "source", source_attrs)
+                    thumb.append(img)
+                a.append(thumb)
+                a.tail, img.tail = img.tail, None
+
+            classes = (p.get("class") or "").split()
+            if "pswp-gallery" not in classes:
+                classes.append("pswp-gallery")
+                p.set("class", " ".join(classes))
+
+
+def _decode_entity(match: "re.Match[str]") -> str:
+    char = html.unescape(match.group(0))
+    return MINIMAL_ESCAPES.get(char, char)
+
+
+def _attribute(match: "re.Match[str]") -> str:
+    value = ENTITY_RE.sub(lambda m: html.unescape(m.group(0)), match.group(2))
+    value = "".join(MINIMAL_ESCAPES.get(char, char) for char in value)
+    # кавычки выбираются как в BeautifulSoup
+    if '"' in value and "'" not in value:
+        return f"{match.group(1)}'{value}'"
+    return f'{match.group(1)}"{value.replace(chr(34), "&quot;")}"'
+
+
+class VoidTagPostprocessor(Postprocessor):
+    """
+    Вывод как у BeautifulSoup (wrap_images): пустые теги <br/> вместо
+    <br />; ссылки на символы (&nbsp;, &copy;, &#8212;) в тексте и в
+    значениях атрибутов заменены самими символами, кроме &amp;, &lt; и
+    &gt;; пробельная строка между тегами - один перевод строки (или
+    пробел), кроме <pre> и <textarea>. Атрибуты сырого HTML в одинарных
+    кавычках или без них остаются как написаны.
+    """
+
+    def run(self, text: str) -> str:
+        parts = MARKUP_RE.split(VOID_TAG_RE.sub(r"\1/>", text))
+        preserve = 0
+        for i, part in enumerate(parts):
+            if i % 2:
+                tag = PRESERVE_RE.match(part)
+                if tag is not None:
+                    preserve = max(0, preserve - 1) if tag.group(1) else preserve + 1
+                if "&" in part and not part.startswith(("<script", "<style")):
+                    parts[i] = ATTR_RE.sub(_attribute, part)
+            elif part and not part.strip() and not preserve:
+                parts[i] = "\n" if "\n" in part else " "
+            else:
+                parts[i] = ENTITY_RE.sub(_decode_entity, part)
+        return "".join(parts)
+
+
+class PswpGalleryExtension(Extension):
+    """
+    Оборачивает картинки в <a data-pswp-width/height> и помечает абзацы
+    классом pswp-gallery на этапе построения дерева. Результат совпадает
+    с wrap_images(markdown(...)), но без повторного парсинга HTML.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.config = {
+            "static_root": ["", "Корень, от которого ищутся картинки"],
+            "sizes": [PAPER_IMAGE_SIZES, "Атрибут sizes для srcset картинок"],
+        }
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md: Markdown) -> None:
+        # после attr_list (8), чтобы класс добавлялся в конец, как у wrap_images
+        md.treeprocessors.register(
+            PswpGalleryTreeprocessor(md, self.getConfig("static_root"), self.getConfig("sizes")),
+            "pswp_gallery",
+            5,
+        )
+        # после сырого HTML (30) и сносок (25), но до amp_substitute (20)
+        md.postprocessors.register(VoidTagPostprocessor(md), "void_tags", 21)
+
+
 def render_pswp_description(desc: List[Union[str, List[str]]]) -> Markup:
     parts: List[str] = []
     has_gallery = False
@@ -81,19 +245,23 @@ def render_pswp_description(desc: List[Union[str, List[str]]]) -> Markup:
 
         # ["text", "path"]
         text, rel_path = item
-        img_path = STATIC_ROOT / rel_path
+        info = IMAGE_INDEX.get(STATIC_ROOT / rel_path)
 
-        if not img_path.exists():
+        if info is None:
             parts.append(str(escape(text)))
             continue
 
-        with Image.open(img_path) as img:
-            w, h = img.size
+        w, h = info.width, info.height
 
         url = url_for("static", filename=f"timeline/res/{rel_path}")
+        # в лайтбоксе PhotoSwipe сам выберет копию под размер экрана
+        rel = IMAGE_VARIANTS.relative(STATIC_ROOT / rel_path)
+        srcset = IMAGE_VARIANTS.srcset(rel) if rel is not None else None
+        srcset_attr = f" data-pswp-srcset='{srcset}'" if srcset else ""
 
         parts.append(
-            f"<a href='{url}' data-pswp-width='{w}' data-pswp-height='{h}'>" f"{escape(text)}</a>"
+            f"<a href='{url}' data-pswp-width='{w}' data-pswp-height='{h}'{srcset_attr}>"
+            f"{escape(text)}</a>"
         )
         has_gallery = True
 
@@ -0,0 +1,80 @@
+import functools
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+SECRETS_PATH = Path(os.environ.get("SECRETS_PATH", "configs/secrets.json"))
+
+# Адреса API: переопределяются, чтобы направить запросы на заглушки (benchmarks/)
+STEAM_API = os.environ.get("STEAM_API", "https://api.steampowered.com")
+GITHUB_GRAPHQL_URL = os.environ.get("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+
+# Карточки Steam/GitHub: после CARDS_STALE_TTL секунд данные отдаются как есть,
+# но в фоне запускается обновление; после CARDS_EXPIRE_TTL запрос ждёт свежих данных
+CARDS_STALE_TTL = int(os.environ.get("CARDS_STALE_TTL", 240))
+CARDS_EXPIRE_TTL = int(os.environ.get("CARDS_EXPIRE_TTL", 24 * 3600))
+
+# Каталог общего для воркеров кэша (SQLite). Пустая строка отключает его
+SHARED_CACHE_DIR = os.environ.get("SHARED_CACHE_DIR", "build/cache")
+# На сколько секунд воркер захватывает обновление ключа
+SHARED_CACHE_LEASE = int(os.environ.get("SHARED_CACHE_LEASE", 60))
+
+# Фоновое обновление карточек внутри процесса приложения (1 - включить).
+# Вместо него можно запустить отдельный воркер: python -m prefetch
+PREFETCH_IN_PROCESS = os.environ.get("PREFETCH_IN_PROCESS", "0") == "1"
+PREFETCH_INTERVAL = int(os.environ.get("PREFETCH_INTERVAL", 180))
+
+# Пул HTTP-соединений к Steam/GitHub (http_client.py)
+HTTP_LIMIT = int(os.environ.get("HTTP_LIMIT", 100))
+HTTP_LIMIT_PER_HOST = int(os.environ.get("HTTP_LIMIT_PER_HOST", 10))
+HTTP_DNS_TTL = int(os.environ.get("HTTP_DNS_TTL", 300))
+HTTP_KEEPALIVE = float(os.environ.get("HTTP_KEEPALIVE", 60))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 30))
+
+# Таймауты, повторы и circuit breaker для Steam/GitHub (upstream.py)
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", 10))
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", 2))
+UPSTREAM_BREAKER_THRESHOLD = int(os.environ.get("UPSTREAM_BREAKER_THRESHOLD", 5))
+UPSTREAM_BREAKER_RESET = float(os.environ.get("UPSTREAM_BREAKER_RESET", 60))
+
+# Сколько байт сжатых HTML-страниц держать в памяти (content_encoding.py)
+COMPRESS_CACHE_BYTES = int(os.environ.get("COMPRESS_CACHE_BYTES", 16 * 1024 * 1024))
+
+# Ширины уменьшенных копий картинок для srcset (image_variants.py)
+IMAGE_VARIANT_WIDTHS = tuple(
+    int(w) for w in os.environ.get("IMAGE_VARIANT_WIDTHS", "160,320,640,960,1280,1920").split(",")
+)
+# Дополнительно делать AVIF (1 - включить); кодирование заметно медленнее WebP
+IMAGE_VARIANT_AVIF = os.environ.get("IMAGE_VARIANT_AVIF", "0") == "1"
+IMAGE_VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", 80))
+
+# Каталог байткода скомпилированных Jinja-шаблонов. Пустая строка отключает его
+JINJA_BYTECODE_DIR = os.environ.get("JINJA_BYTECODE_DIR", "build/jinja")
+# Минификация HTML: response - Flask-Minify на каждом ответе, templates - один раз
+# при компиляции шаблонов (template_minify.py), off - без минификации
+MINIFY_MODE = os.environ.get("MINIFY_MODE", "response")
+# Сколько байт отрендеренных фрагментов (info_panel, navigation) держать в памяти
+FRAGMENT_CACHE_BYTES = int(os.environ.get("FRAGMENT_CACHE_BYTES", 1024 * 1024))
+
+# Создавать и прогревать приложение в мастере gunicorn до fork'а (gunicorn.conf.py),
+# чтобы воркеры делили готовые кэши (0 - каждый воркер загружается сам)
+WARMUP = os.environ.get("WARMUP", "1") == "1"
+# Адрес сайта для страниц прогрева: в них есть абсолютные ссылки, и кэши готовых
+# страниц пригодятся, только если хост совпадает с тем, что присылают клиенты
+WARMUP_BASE_URL = os.environ.get("WARMUP_BASE_URL", "http://localhost/")
+
+# Публичный адрес сайта для статического экспорта (export.py): из него
+# строятся canonical- и og-ссылки, так что значения по умолчанию нет
+SITE_URL = os.environ.get("SITE_URL", "")
+
+# Потоки для синхронной части Flask в ASGI-режиме (asgi.py): столько запросов
+# процесс обрабатывает одновременно
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", 32))
+
+
+@functools.lru_cache(maxsize=None)
+def load_secrets() -> Dict[str, Any]:
+    with open(SECRETS_PATH, encoding="utf-8") as f:
+        secrets: Dict[str, Any] = json.load(f)
+    return secrets
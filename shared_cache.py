@@ -0,0 +1,94 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from settings import SHARED_CACHE_DIR
+
+
+class SharedCache:
+    """
+    Кэш на SQLite, общий для всех процессов (воркеров gunicorn) на машине.
+
+    Значения хранятся в JSON вместе со временем получения и сроком жизни.
+    Каждая запись — отдельная транзакция, так что читатели видят либо старое,
+    либо новое значение целиком. Таблица locks даёт аренду ключа на время
+    обновления, чтобы в upstream ходил только один воркер.
+    """
+
+    def __init__(self, path: Path, timeout: float = 5.0) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._token = uuid.uuid4().hex
+        self._initialized_pid: Optional[int] = None
+
+    @property
+    def owner(self) -> str:
+        # pid обязателен: после fork'а у воркеров одинаковый _token
+        return f"{self._token}:{os.getpid()}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._initialized_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        if self._initialized_pid != os.getpid():
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._initialized_pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(значение, время получения) или None, если записи нет или она истекла."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value, fetched_at FROM entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, fetched_at: float, ttl: float) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, data, fetched_at, fetched_at + ttl),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            conn.execute("COMMIT")
+
+    def acquire(self, key: str, lease: float) -> bool:
+        """Берёт аренду ключа на lease секунд. False, если его уже обновляет другой."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "INSERT INTO locks (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at WHERE locks.expires_at <= ?",
+                (key, self.owner, now + lease, now),
+            )
+            return cur.rowcount == 1
+
+    def release(self, key: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, self.owner))
+
+
+SHARED_CACHE: Optional[SharedCache] = (
+    SharedCache(Path(SHARED_CACHE_DIR) / "cache.sqlite3") if SHARED_CACHE_DIR else None
+)
@@ -1,28 +1,29 @@
 import asyncio
-import json
 from typing import Any, Dict
 
-import aiohttp
-from async_lru import alru_cache
-
+from cache import swr_cache
+from metrics import timed
+from settings import (
+    CARDS_EXPIRE_TTL,
+    CARDS_STALE_TTL,
+    SHARED_CACHE_LEASE,
+    STEAM_API,
+    load_secrets,
+)
+from shared_cache import SHARED_CACHE
 from tools import humanize_timestamp, plural_ru
+from upstream import UpstreamClient
 
-with open("configs/secrets.json", encoding="utf-8") as f:
-    SECRETS = json.load(f)
-
-STEAM_KEY = SECRETS["steam"]
-STEAM_ID = SECRETS["steam_id"]
-STEAM_API = "https://api.steampowered.com"
+STEAM = UpstreamClient("steam")
 
 
 async def steam_get(
-    session: aiohttp.ClientSession, interface: str, method: str, version: str = "v1", **params: Any
+    interface: str, method: str, version: str = "v1", **params: Any
 ) -> Dict[str, Any]:
     url = f"{STEAM_API}/{interface}/{method}/{version}"
-    params["key"] = STEAM_KEY
-    async with session.get(url, params=params) as resp:
-        resp.raise_for_status()
-        return dict(await resp.json())
+    params["key"] = load_secrets()["steam"]
+    with timed("steam"):
+        return await STEAM.request_json("GET", url, params=params)
 
 
 def humanize_playtime(ts: int) -> str:
@@ -46,67 +47,67 @@ def humanize_playtime(ts: int) -> str:
     return "UNKNOWN ERROR HP"
 
 
-@alru_cache(ttl=240)
+@swr_cache(
+    stale_ttl=CARDS_STALE_TTL,
+    expire_ttl=CARDS_EXPIRE_TTL,
+    backend=SHARED_CACHE,
+    lease=SHARED_CACHE_LEASE,
+)
 async def get_user_data() -> dict[str, dict]:
-    async with aiohttp.ClientSession() as session:
-        # Получаем пользователя, бейджи и игры
-        user, badges, games = await asyncio.gather(
-            steam_get(session, "ISteamUser", "GetPlayerSummaries", steamids=STEAM_ID),
-            steam_get(session, "IPlayerService", "GetBadges", steamid=STEAM_ID),
-            steam_get(
-                session,
-                "IPlayerService",
-                "GetOwnedGames",
-                steamid=STEAM_ID,
-                include_appinfo=1,
-                include_played_free_games=1,
-            ),
-        )
+    # Получаем пользователя, бейджи и игры
+    steam_id = load_secrets()["steam_id"]
+    user, badges, games = await asyncio.gather(
+        steam_get("ISteamUser", "GetPlayerSummaries", steamids=steam_id),
+        steam_get("IPlayerService", "GetBadges", steamid=steam_id),
+        steam_get(
+            "IPlayerService",
+            "GetOwnedGames",
+            steamid=steam_id,
+            include_appinfo=1,
+            include_played_free_games=1,
+        ),
+    )
 
-        user = user["response"]["players"]["player"][0]
-        badges = badges["response"]
-        games = games["response"]["games"]
-
-        real_state = [
-            "offline",
-            "online",
-            "занят",
-            "отошел",
-            "спит",
-            "торгует",
-            "ищет игру",
-            "играет в {game}",
-        ]
-        online_state = ["offline", "online", "busy", "away", "away", "online", "online", "busy"]
-        user["onlineState"] = online_state[user["personastate"]].replace(" ", "")
-        if "gameextrainfo" in user:
-            user["lastlog"] = real_state[-1].format(game=user["gameextrainfo"])
+    user = user["response"]["players"]["player"][0]
+    badges = badges["response"]
+    games = games["response"]["games"]
+
+    real_state = [
+        "offline",
+        "online",
+        "занят",
+        "отошел",
+        "спит",
+        "торгует",
+        "ищет игру",
+        "играет в {game}",
+    ]
+    online_state = ["offline", "online", "busy", "away", "away", "online", "online", "busy"]
+    user["onlineState"] = online_state[user["personastate"]].replace(" ", "")
+    if "gameextrainfo" in user:
+        user["lastlog"] = real_state[-1].format(game=user["gameextrainfo"])
+    else:
+        if user["personastate"] == 0:
+            user["lastlog"] = humanize_timestamp(user["lastlogoff"], tz_offset=0)
         else:
-            if user["personastate"] == 0:
-                user["lastlog"] = humanize_timestamp(user["lastlogoff"], tz_offset=0)
-            else:
-                user["lastlog"] = real_state[user["personastate"]]
-
-        user["timecreated_word"] = humanize_timestamp(user["timecreated"])
-
-        badges["player_level_word"] = f"{badges['player_level']} уровень"
-        badges["percent"] = round(
-            100
-            / (badges["player_xp"] + badges["player_xp_needed_to_level_up"])
-            * badges["player_xp"],
-            1,
-        )
+            user["lastlog"] = real_state[user["personastate"]]
 
-        # Сортируем игры по playtime_forever и берём первые 30
-        top_games = sorted(games, key=lambda x: x.get("playtime_forever", 0), reverse=True)[:20]
+    user["timecreated_word"] = humanize_timestamp(user["timecreated"])
 
-        for g in top_games:
-            g["vlogo"] = (
-                f"https://steamcdn-a.akamaihd.net/steam/apps/{g['appid']}/library_600x900.jpg"
-            )
-            g["playtime_word"] = humanize_playtime(int(g["playtime_forever"]))
-            g["gamelink"] = (
-                f"https://store.steampowered.com/app/{g['appid']}/{g['name'].replace(' ', '_')}"
-            )
+    badges["player_level_word"] = f"{badges['player_level']} уровень"
+    badges["percent"] = round(
+        100 / (badges["player_xp"] + badges["player_xp_needed_to_level_up"]) * badges["player_xp"],
+        1,
+    )
+
+    # Сортируем игры по playtime_forever и берём первые 30
+    top_games = sorted(games, key=lambda x: x.get("playtime_forever", 0), reverse=True)[:20]
+
+    for g in top_games:
+        g["vlogo"] = f"https://steamcdn-a.akamaihd.net/steam/apps/{g['appid']}/library_600x900.jpg"
+        g["playtime_word"] = humanize_playtime(int(g["playtime_forever"]))
+        g["gamelink"] = (
+            f"https://store.steampowered.com/app/{g['appid']}/{g['name'].replace(' ', '_')}"
+        )
 
-        return {"user": user, "badges": badges, "games": top_games}
+    return {"user": user, "badges": badges, "games": top_games}
@@ -0,0 +1,144 @@
+import re
+from typing import List, Optional
+
+from jinja2.ext import Extension
+
+# Что минифицируется: HTML-шаблоны и подключаемые в них SVG (cv.txt - нет)
+EXTENSIONS = (".html", ".svg")
+# <script> с этими type (или без type) минифицируются jsmin
+SCRIPT_TYPES = ("", "text/javascript", "module", "application/json", "application/ld+json")
+
+_RAW_RE = re.compile(r"{%-?\s*raw\s*-?%}.*?{%-?\s*endraw\s*-?%}", re.S)
+_JINJA_RE = re.compile(r"{#.*?#}|{%.*?%}|{{.*?}}", re.S)
+_BLOCK_RE = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.S | re.I)
+_TYPE_RE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]*)""", re.I)
+_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_TAG_RE = re.compile(r"(<[^>]*>)")
+_SPACE_RE = re.compile(r"\s+")
+_ATTR_SPACE_RE = re.compile(r"(\"[^\"]*\"|'[^']*')|\s+")
+_TAG_END_SPACE_RE = re.compile(r"\s+(/?>)$")
+# Заглушки: E - {{ }}, S - {% %} и {# #}, P - защищённый блок. Без <, > и пробелов,
+# допустимые идентификаторы JS/CSS, чтобы их не испортили jsmin и rcssmin
+_TOKEN = "JINJA{}{}X"
+_TOKEN_RE = re.compile(r"JINJA([SEP])(\d+)X")
+_TOKEN_END_RE = re.compile(r"JINJA([SEP])(\d+)X\Z")
+_HOLDER_RE = re.compile(r"JINJA([SE])(\d+)X")
+_PROTECTED_RE = re.compile(r"JINJAP(\d+)X")
+
+
+def _minify_block(open_tag: str, tag: str, body: str) -> str:
+    from build_assets import minify
+
+    tag = tag.lower()
+    if tag == "style":
+        return minify("inline.css", body)
+    if tag == "script":
+        match = _TYPE_RE.search(open_tag)
+        if (match.group(1).lower() if match else "") in SCRIPT_TYPES:
+            return minify("inline.js", body)
+    return body
+
+
+def _is_boundary(text: str, start: int, step: int) -> bool:
+    """
+    Упирается ли пробел в тег (или в край текста), если идти от start
+    в сторону step через {% %} и пробелы: они в вывод не попадают.
+    Защищённый блок (<script>, <pre>...) - тоже тег.
+    """
+    i = start
+    while 0 <= i < len(text):
+        if text[i].isspace():
+            i += step
+            continue
+        if step > 0:
+            match = _TOKEN_RE.match(text, i)
+        else:
+            match = _TOKEN_END_RE.search(text, max(0, i - 16), i + 1)
+        if match is None:
+            return False
+        if match.group(1) == "P":
+            return True
+        if match.group(1) == "E":
+            return False
+        i = match.end() if step > 0 else match.start() - 1
+    return True
+
+
+def _collapse_text(text: str) -> str:
+    """
+    Как htmlmin с remove_empty_space: пробелы с переводом строки между
+    тегами убираются, остальные сжимаются до одного.
+    """
+
+    def replace(match: "re.Match[str]") -> str:
+        space = match.group(0)
+        if "\n" in space or "\r" in space:
+            if _is_boundary(text, match.start() - 1, -1) and _is_boundary(text, match.end(), 1):
+                return ""
+        return " "
+
+    return _SPACE_RE.sub(replace, text)
+
+
+def _collapse_tag(tag: str) -> str:
+    """Пробелы между атрибутами - один пробел; значения в кавычках не трогаются."""
+    tag = _ATTR_SPACE_RE.sub(lambda m: m.group(1) or " ", tag)
+    return _TAG_END_SPACE_RE.sub(r"\1", tag)
+
+
+def minify_template(source: str) -> str:
+    """
+    Минифицирует исходник шаблона: убирает HTML-комментарии и пробелы
+    между тегами, минифицирует inline CSS/JS теми же rcssmin/jsmin, что и
+    build_assets.py. Конструкции Jinja и значения атрибутов не меняются,
+    <pre> и <textarea> остаются как есть.
+    """
+    protected: List[str] = []
+
+    def protect(value: str) -> str:
+        protected.append(value)
+        return _TOKEN.format("P", len(protected) - 1)
+
+    source = _RAW_RE.sub(lambda m: protect(m.group(0)), source)
+
+    holders: List[str] = []
+
+    def hold(match: "re.Match[str]") -> str:
+        holders.append(match.group(0))
+        return _TOKEN.format("E" if match.group(0).startswith("{{") else "S", len(holders) - 1)
+
+    source = _JINJA_RE.sub(hold, source)
+
+    def block(match: "re.Match[str]") -> str:
+        open_tag, tag, body, close_tag = match.groups()
+        return protect(open_tag + _minify_block(open_tag, tag, body) + close_tag)
+
+    source = _BLOCK_RE.sub(block, source)
+    source = _COMMENT_RE.sub("", source)
+
+    parts = _TAG_RE.split(source)
+    for i in range(0, len(parts), 2):
+        parts[i] = _collapse_text(parts[i])
+    for i in range(1, len(parts), 2):
+        parts[i] = _collapse_tag(parts[i])
+    source = "".join(parts)
+
+    def restore_protected(match: "re.Match[str]") -> str:
+        return protected[int(match.group(1))]
+
+    # защищённые блоки могут содержать заглушки Jinja, так что сначала они
+    while _PROTECTED_RE.search(source):
+        source = _PROTECTED_RE.sub(restore_protected, source)
+    return _HOLDER_RE.sub(lambda m: holders[int(m.group(2))], source)
+
+
+class MinifyTemplatesExtension(Extension):
+    """
+    Минификация HTML при компиляции шаблона, а не при каждом ответе
+    (MINIFY_MODE=templates): результат попадает в байткод и кэш Jinja.
+    """
+
+    def preprocess(self, source: str, name: Optional[str], filename: Optional[str] = None) -> str:
+        if name is None or not name.endswith(EXTENSIONS):
+            return source
+        return minify_template(source)
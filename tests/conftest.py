@@ -0,0 +1,20 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # settings читает окружение при импорте: задаём его до импорта модулей сайта
+    tmp = Path(tempfile.mkdtemp(prefix="site-tests-"))
+    secrets = tmp / "secrets.json"
+    secrets.write_text(
+        json.dumps({"github": "x", "github_id": "x", "steam": "x", "steam_id": "1"}),
+        encoding="utf-8",
+    )
+    os.environ.setdefault("SECRETS_PATH", str(secrets))
+    os.environ.setdefault("SHARED_CACHE_DIR", str(tmp))
+    os.environ.setdefault("PREFETCH_IN_PROCESS", "0")
+    os.environ.setdefault("JINJA_BYTECODE_DIR", "")
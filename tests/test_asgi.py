@@ -0,0 +1,51 @@
+"""asgi.py: адаптер собирается на установленной версии asgiref и отвечает на запрос."""
+
+import asyncio
+import threading
+from typing import Any, Dict, List
+
+from flask import Flask
+
+import asgi
+from main import create_app
+
+
+def _request(app: asgi.ASGIApp, path: str) -> List[Dict[str, Any]]:
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+    }
+    messages: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+def test_serves_request() -> None:
+    messages = _request(asgi.app, "/robots.txt")
+    assert messages[0]["type"] == "http.response.start"
+    assert messages[0]["status"] == 200
+    assert b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_runs_in_asgi_pool() -> None:
+    # WSGI-приложение выполняется в пуле asgi.py, а не в общем потоке asgiref
+    threads: List[str] = []
+    app: Flask = create_app()
+    app.before_request(lambda: threads.append(threading.current_thread().name))
+
+    _request(asgi.ASGIApp(app), "/robots.txt")
+    assert len(threads) == 1 and threads[0].startswith("asgi")
@@ -0,0 +1,47 @@
+"""ContributionCalendar против прежней агрегации из github.fetch_github_data."""
+
+import copy
+from datetime import date, timedelta
+
+from benchmarks.contributions import legacy_monthly, make_weeks
+from contributions import ContributionCalendar, aggregate_monthly
+
+TODAY = date(2025, 6, 15)
+
+
+def test_full_year() -> None:
+    weeks = make_weeks(TODAY)
+    assert aggregate_monthly(weeks) == legacy_monthly(weeks)
+
+
+def test_short_window() -> None:
+    weeks = make_weeks(TODAY, days=3)
+    assert aggregate_monthly(weeks) == legacy_monthly(weeks)
+
+
+def test_empty() -> None:
+    assert aggregate_monthly([]) == legacy_monthly([])
+
+
+def test_incremental_merge() -> None:
+    # окно сдвигается на день: первый день выпадает, новый добавляется
+    calendar = ContributionCalendar().merge_weeks(make_weeks(TODAY))
+    for shift in (1, 2, 40):
+        weeks = make_weeks(TODAY + timedelta(days=shift), seed=shift)
+        assert calendar.merge_weeks(weeks).monthly() == legacy_monthly(weeks)
+
+
+def test_incremental_merge_same_window() -> None:
+    weeks = make_weeks(TODAY)
+    calendar = ContributionCalendar().merge_weeks(weeks)
+    assert calendar.merge_weeks(weeks).monthly() == legacy_monthly(weeks)
+
+
+def test_mid_window_insert() -> None:
+    weeks = make_weeks(TODAY)
+    # в прошлом ответе не было дня из середины окна
+    missing = copy.deepcopy(weeks)
+    del missing[20]["contributionDays"][3]
+    calendar = ContributionCalendar().merge_weeks(missing)
+    assert calendar.monthly() == legacy_monthly(missing)
+    assert calendar.merge_weeks(weeks).monthly() == legacy_monthly(weeks)
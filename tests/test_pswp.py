@@ -0,0 +1,32 @@
+"""PswpGalleryExtension против прежнего пути markdown + wrap_images."""
+
+import pytest
+
+from papers import list_papers
+from pswp import wrap_images
+from tools import render_md
+
+SAMPLES = {
+    "entities": "a&nbsp;b &copy; 2024 &mdash; x &#8212; y &#38; z &amp; q &lt;tag&gt; AT&T 5 > 3",
+    "footnote": "Текст со сноской[^1] и вторая[^note].\n\n[^1]: Сноска &copy; тут.\n"
+    "[^note]: Ещё одна\n    в две строки.",
+    "abbr": "Страница на HTML и CSS.\n\n*[HTML]: Hyper Text &amp; Markup Language\n"
+    '*[CSS]: Cascading "Style" Sheets',
+    "raw_html": '<div title="a &amp; b &copy;">сырой &nbsp; HTML<br />x</div>\n\n'
+    "<script>var a = '&nbsp;' + 1 />0;</script>\n\n`code &copy; />` и ' />' в тексте",
+    "link_title": "[ссылка](http://x.com/?a=1&b=2 \"t &copy; 't'\")",
+    "code_block": "Код:\n\n    line one\n\n\n    line &copy; two\n\n---\n\nконец  \nстрока",
+    "table": "| a | b |\n|---|---|\n| &copy; | 1 |",
+}
+
+
+@pytest.mark.parametrize("md", SAMPLES.values(), ids=SAMPLES.keys())
+def test_matches_wrap_images(md: str) -> None:
+    assert str(render_md(md, gallery=True)) == wrap_images(render_md(md))
+
+
+@pytest.mark.parametrize("md_path", [path for _, path in list_papers()])
+def test_papers_match_wrap_images(md_path: str) -> None:
+    with open(md_path, encoding="utf-8") as f:
+        md = f.read()
+    assert str(render_md(md, gallery=True)) == wrap_images(render_md(md))
@@ -0,0 +1,80 @@
+import copy
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools import render_md
+
+TIMELINE_PATH = Path("configs/timeline.json")
+
+
+def _compile(path: Path) -> Tuple[Tuple[Dict[str, Any], ...], Tuple[int, ...]]:
+    """Рендерит описания один раз. Возвращает записи и индексы записей с "to": "NOW"."""
+    from pswp import render_pswp_description
+
+    with open(path, encoding="utf-8") as f:
+        exp: List[Dict[str, Any]] = json.load(f)
+
+    now_indexes = []
+    for i, e in enumerate(exp):
+        if isinstance(e.get("description"), list):
+            e["description"] = render_md(render_pswp_description(e["description"]))
+
+        if "point" not in e["timeline"] and e["timeline"]["to"].upper() == "NOW":
+            now_indexes.append(i)
+
+    return tuple(exp), tuple(now_indexes)
+
+
+class TimelineStore:
+    """
+    Скомпилированный configs/timeline.json: markdown и размеры картинок
+    считаются только при изменении mtime файла, "NOW" подставляется заново
+    только при смене даты. Возвращаемые записи менять нельзя.
+    """
+
+    def __init__(self, path: Path = TIMELINE_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._compiled: Tuple[Dict[str, Any], ...] = ()
+        self._now_indexes: Tuple[int, ...] = ()
+        self._resolved_date: Optional[date] = None
+        self._resolved: Tuple[Dict[str, Any], ...] = ()
+
+    @property
+    def mtime(self) -> float:
+        """mtime файла на диске: по нему видно изменение ещё до перекомпиляции."""
+        return os.stat(self.path).st_mtime
+
+    def _resolve(self, today: date) -> Tuple[Dict[str, Any], ...]:
+        resolved = list(self._compiled)
+        for i in self._now_indexes:
+            e = copy.copy(resolved[i])
+            e["timeline"] = dict(e["timeline"], to=today.strftime("%d.%m.%Y"), now=True)
+            resolved[i] = e
+        return tuple(resolved)
+
+    def get(self) -> Tuple[Dict[str, Any], ...]:
+        mtime = os.stat(self.path).st_mtime
+        today = date.today()
+        if mtime == self._mtime and today == self._resolved_date:
+            return self._resolved
+
+        with self._lock:
+            if mtime != self._mtime:
+                self._compiled, self._now_indexes = _compile(self.path)
+                self._resolved_date = None
+                self._mtime = mtime
+
+            if today != self._resolved_date:
+                self._resolved = self._resolve(today)
+                self._resolved_date = today
+
+            return self._resolved
+
+
+TIMELINE = TimelineStore()
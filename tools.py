@@ -1,13 +1,24 @@
 import time
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
-import markdown
 from markupsafe import Markup
 
+from metrics import timed
 
-def render_md(text: str) -> Markup:
-    html = markdown.markdown(text, extensions=["extra", "sane_lists", "nl2br"])
+
+def render_md(text: str, gallery: bool = False) -> Markup:
+    """gallery=True дополнительно оборачивает картинки для PhotoSwipe."""
+    # markdown импортируется при первом рендере: воркер стартует быстрее
+    import markdown
+
+    from pswp import PswpGalleryExtension
+
+    extensions: List[Any] = ["extra", "sane_lists", "nl2br"]
+    if gallery:
+        extensions.append(PswpGalleryExtension())
+    with timed("markdown"):
+        html = markdown.markdown(text, extensions=extensions)
     return Markup(html)
 
 
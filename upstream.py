@@ -0,0 +1,169 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from http_client import get_session
+from settings import (
+    UPSTREAM_BREAKER_RESET,
+    UPSTREAM_BREAKER_THRESHOLD,
+    UPSTREAM_RETRIES,
+    UPSTREAM_TIMEOUT,
+)
+
+
+class UpstreamError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(UpstreamError):
+    """Upstream недавно падал подряд — запрос даже не отправляется."""
+
+
+class UpstreamClient:
+    """
+    Обёртка над общей aiohttp-сессией для одного upstream (Steam, GitHub):
+
+    - таймаут на каждый запрос;
+    - повтор с экспоненциальной задержкой на 5xx, 429 и сетевые ошибки
+      (с учётом Retry-After); задержка не больше max_delay, а если upstream
+      просит ждать дольше, запрос сразу падает - пусть отдаётся старый ответ;
+    - circuit breaker: после failure_threshold неудач подряд запросы
+      сразу падают с CircuitOpenError в течение reset_after секунд,
+      затем пропускается одна пробная попытка (half-open), а остальные
+      запросы падают, пока она не закончится; успех закрывает breaker,
+      неудача открывает его снова;
+    - учёт квоты из заголовков X-RateLimit-* и стоимости запросов.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = UPSTREAM_TIMEOUT,
+        retries: int = UPSTREAM_RETRIES,
+        backoff: float = 0.5,
+        failure_threshold: int = UPSTREAM_BREAKER_THRESHOLD,
+        reset_after: float = UPSTREAM_BREAKER_RESET,
+        max_delay: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.max_delay = timeout if max_delay is None else max_delay
+
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.rate_limit: Dict[str, Any] = {}
+        self.last_cost: Optional[int] = None
+        self.total_cost = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Отклоняются ли запросы: breaker открыт или идёт пробная попытка."""
+        if self.opened_at is None:
+            return False
+        return self._probing or time.time() - self.opened_at < self.reset_after
+
+    def _check_breaker(self) -> bool:
+        """Пропускает запрос или бросает CircuitOpenError. True - это пробная попытка."""
+        if self.is_open:
+            raise CircuitOpenError(f"{self.name}: circuit breaker открыт")
+        if self.opened_at is None:
+            return False
+        # все вызовы идут в одном loop'е, так что проверка и флаг атомарны
+        self._probing = True
+        return True
+
+    def _on_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def _on_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.time()
+
+    def _record_headers(self, headers: Mapping[str, str]) -> None:
+        for key in ("Limit", "Remaining", "Used", "Reset"):
+            value = headers.get(f"X-RateLimit-{key}")
+            if value is not None and value.isdigit():
+                self.rate_limit[key.lower()] = int(value)
+
+    def record_cost(self, cost: Optional[int], remaining: Optional[int] = None) -> None:
+        """Стоимость запроса, которую upstream сообщил в теле ответа (GraphQL rateLimit)."""
+        if cost is not None:
+            self.last_cost = cost
+            self.total_cost += cost
+        if remaining is not None:
+            self.rate_limit["remaining"] = remaining
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> Optional[float]:
+        """Пауза перед повтором или None, если Retry-After больше max_delay."""
+        if retry_after is not None and retry_after.isdigit():
+            delay = float(retry_after)
+            return delay if delay <= self.max_delay else None
+        return min(self.max_delay, float(self.backoff * 2**attempt * random.uniform(0.8, 1.2)))
+
+    async def request_json(self, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        probe = self._check_breaker()
+        try:
+            return await self._request_json(method, url, **kwargs)
+        finally:
+            if probe:
+                self._probing = False
+
+    async def _request_json(self, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        error = UpstreamError(f"{self.name}: запрос не выполнялся")
+        for attempt in range(self.retries + 1):
+            retry_after: Optional[str] = None
+            self.requests += 1
+            try:
+                async with get_session().request(method, url, timeout=timeout, **kwargs) as resp:
+                    self._record_headers(resp.headers)
+                    if resp.status == 200:
+                        data: Dict[str, Any] = dict(await resp.json())
+                        self._on_success()
+                        return data
+
+                    text = await resp.text()
+                    error = UpstreamError(
+                        f"{self.name}: HTTP {resp.status}: {text[:500]}", resp.status
+                    )
+                    if resp.status != 429 and resp.status < 500:
+                        break
+                    retry_after = resp.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = UpstreamError(f"{self.name}: {type(e).__name__}: {e}")
+
+            if attempt < self.retries:
+                delay = self._delay(attempt, retry_after)
+                if delay is None:
+                    break
+                self.retried += 1
+                await asyncio.sleep(delay)
+
+        self._on_failure()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "consecutive_failures": self.failures,
+            "circuit_open": self.is_open,
+            "rate_limit": dict(self.rate_limit),
+            "last_cost": self.last_cost,
+            "total_cost": self.total_cost,
+        }
@@ -0,0 +1,118 @@
+"""
+Прогрев приложения перед fork'ом. gunicorn с preload_app (gunicorn.conf.py)
+вызывает warmup() в мастере: конфиги, размеры картинок, шаблоны, статьи,
+таймлайн и страницы готовы до старта воркеров, и воркеры делят их
+copy-on-write, а не собирают каждый заново на первых запросах.
+
+    python warmup.py   # время шагов и память процесса
+"""
+
+import gc
+import sys
+import time
+from typing import Callable, Dict
+
+from flask import Flask
+
+from assets import ASSETS
+from content_encoding import encodings
+from export import page_paths
+from image_index import IMAGE_INDEX
+from metrics import METRICS
+from papers import PAPER_CACHE, list_papers
+from settings import WARMUP_BASE_URL
+from timeline import TIMELINE
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def memory_usage(pid: str = "self") -> Dict[str, float]:
+    """
+    Память процесса в МБ из /proc/<pid>/smaps_rollup. Pss делит общие
+    страницы между процессами, так что сумма Pss воркеров - их реальная
+    цена. Не на Linux возвращает пустой словарь.
+    """
+    usage: Dict[str, float] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in SMAPS_FIELDS:
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return usage
+
+
+def format_memory(usage: Dict[str, float]) -> str:
+    return ", ".join(f"{key} {value:.1f} MB" for key, value in usage.items()) or "нет данных"
+
+
+def _compile_templates(app: Flask) -> None:
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+def _render_papers() -> None:
+    for slug, md_path in list_papers():
+        PAPER_CACHE.get(str(md_path), slug)
+
+
+def _import_lazy_modules() -> None:
+    # то, что create_app() откладывает до первого запроса
+    import aiohttp  # noqa: F401
+    import bs4  # noqa: F401
+    import markdown  # noqa: F401
+    import PIL.Image  # noqa: F401
+
+
+def _request_pages(app: Flask, base_url: str) -> None:
+    """Кэши фрагментов, Flask-Minify и сжатых страниц: по запросу на кодирование."""
+    client = app.test_client()
+    for path in page_paths():
+        for encoding in encodings():
+            client.get(path, base_url=base_url, headers={"Accept-Encoding": encoding})
+
+
+def warmup(app: Flask, base_url: str = WARMUP_BASE_URL, freeze: bool = True) -> Dict[str, float]:
+    """
+    Выполняет прогрев и возвращает время шагов в миллисекундах.
+    freeze=True переносит все объекты в постоянное поколение (gc.freeze):
+    сборщик мусора воркера не трогает их и не копирует общие страницы.
+    """
+    from main import CONFIG_STORE
+
+    steps: Dict[str, Callable[[], object]] = {
+        "imports": _import_lazy_modules,
+        "config": CONFIG_STORE.context,
+        "image_index": IMAGE_INDEX.scan,
+        "templates": lambda: _compile_templates(app),
+        "papers": _render_papers,
+        "timeline": TIMELINE.get,
+        "assets": lambda: ASSETS.files,
+        "pages": lambda: _request_pages(app, base_url),
+    }
+    timings: Dict[str, float] = {}
+    # url_for в статьях и таймлайне работает только внутри запроса
+    with app.test_request_context(base_url=base_url):
+        for name, step in steps.items():
+            start = time.perf_counter()
+            step()
+            timings[name] = (time.perf_counter() - start) * 1000
+
+    # запросы прогрева не должны попасть в /metrics каждого воркера
+    METRICS.reset()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return timings
+
+
+if __name__ == "__main__":
+    from main import create_app
+
+    before = memory_usage()
+    for step, ms in warmup(create_app(), freeze=False).items():
+        print(f"{step:<12} {ms:8.1f} ms", file=sys.stderr)
+    print(f"до:    {format_memory(before)}", file=sys.stderr)
+    print(f"после: {format_memory(memory_usage())}", file=sys.stderr)